@@ -0,0 +1,219 @@
+"""Micro-benchmark of every registered pose detector.
+
+    python -m benchmarks.detectors --out results.json
+    python -m benchmarks.detectors --compare results.json
+
+Each detector in PoseDetection.pose_functions, plus auto-detection, is called once per frame
+on synthetic frames or on recorded ones (--recorded, an (N, 33, C) array in .npy or .npz, or a
+session recording of poses/recorder.py).
+Per pose it reports frames per second, the per-call latency distribution and the memory a
+call allocates (traced by tracemalloc in a separate pass, so tracing does not slow the
+timed pass). --compare runs the benchmark and exits with status 1 when a pose got slower (by
+the median of its fastest pass) or allocates more than the baseline by more than --threshold.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from poses import recorder
+from poses.asans.batch import check_frames, present_frames
+from poses.asans.landmarks import NUM_LANDMARKS
+from poses.pose_detection import AUTO_POSE, PoseDetection
+
+# Per-frame budget of a 30 fps stream
+BUDGET_MS = 1000 / 30
+PERCENTILES = (50, 95, 99)
+
+
+def synthetic_frames(count, seed=0):
+    """Random (count, 33, 4) float32 frames: x and y inside the image, small z, visibility 0.5-1."""
+    rng = np.random.default_rng(seed)
+    frames = np.empty((count, NUM_LANDMARKS, 4), dtype=np.float32)
+    frames[..., :2] = rng.uniform(0.1, 0.9, (count, NUM_LANDMARKS, 2))
+    frames[..., 2] = rng.normal(0, 0.1, (count, NUM_LANDMARKS))
+    frames[..., 3] = rng.uniform(0.5, 1.0, (count, NUM_LANDMARKS))
+    return frames
+
+
+def load_frames(path):
+    """Recorded frames from an .npy array, the `landmarks` array of an .npz file or a session recording.
+
+    Frames without a person (non-finite landmarks, as poses.video writes them) are left out;
+    raises ValueError when none is left.
+    """
+    if path.endswith(recorder.SUFFIX):
+        frames = np.ascontiguousarray(recorder.SessionLog(path).landmarks)
+    else:
+        data = np.load(path)
+        if isinstance(data, np.lib.npyio.NpzFile):
+            data = data["landmarks"]
+        frames = check_frames(data)
+        frames = np.ascontiguousarray(frames[present_frames(frames)], dtype=np.float32)
+    if not len(frames):
+        raise ValueError(f"No frames with a person in {path}")
+    return frames
+
+
+def detectors(pose_detector, names=None):
+    """(name, function of one frame) for every registered pose, auto-detection included, or the named ones."""
+    functions = dict(pose_detector.pose_functions)
+    functions[AUTO_POSE] = lambda frame: pose_detector.analyze_auto(frame)
+    if not names:
+        return list(functions.items())
+    names = [name.upper() for name in names]
+    unknown = sorted(set(names) - set(functions))
+    if unknown:
+        raise ValueError(f"Unknown pose(s): {', '.join(unknown)}")
+    return [(name, function) for name, function in functions.items() if name in names]
+
+
+def time_pass(function, frames):
+    """Per-call latencies in seconds over one pass of the frames."""
+    latencies = np.empty(len(frames))
+    for i, frame in enumerate(frames):
+        started = time.perf_counter()
+        function(frame)
+        latencies[i] = time.perf_counter() - started
+    return latencies
+
+
+def trace_allocations(function, frames):
+    """Mean peak bytes allocated during a call, and mean bytes still held after it."""
+    peaks = []
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        for frame in frames:
+            tracemalloc.reset_peak()
+            start, _ = tracemalloc.get_traced_memory()
+            function(frame)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - start)
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return float(np.mean(peaks)), (after - before) / len(frames)
+
+
+def benchmark(frames, repeat=3, warmup=10, names=None, functions=None):
+    """Benchmark every detector on frames, or the given detectors(); returns the JSON-ready results.
+
+    The timed passes go round-robin over the poses, so a change in machine load during the
+    run slows every pose alike instead of whichever ran at that moment.
+    """
+    functions = functions or detectors(PoseDetection(), names)
+    passes = {name: [] for name, _ in functions}
+    for name, function in functions:
+        for frame in frames[:warmup]:
+            function(frame)
+    for _ in range(repeat):
+        for name, function in functions:
+            passes[name].append(time_pass(function, frames))
+
+    poses = {}
+    for name, function in functions:
+        latencies = np.concatenate(passes[name])
+        peak_bytes, retained_bytes = trace_allocations(function, frames[:min(len(frames), 100)])
+        percentiles = np.percentile(latencies, PERCENTILES) * 1e6
+        poses[name] = {
+            "calls": len(latencies),
+            "fps": len(latencies) / float(latencies.sum()),
+            "latency_us": dict(
+                mean=float(latencies.mean() * 1e6),
+                **{f"p{p}": float(v) for p, v in zip(PERCENTILES, percentiles)},
+                max=float(latencies.max() * 1e6),
+                # Median of the fastest pass: what --compare uses, being the least sensitive to noise
+                best_p50=float(min(np.median(latencies) for latencies in passes[name]) * 1e6),
+            ),
+            "budget_share_p99": float(percentiles[-1] / 1000 / BUDGET_MS),
+            "peak_alloc_bytes": peak_bytes,
+            "retained_bytes": retained_bytes,
+        }
+    return poses
+
+
+def compare(results, baseline, threshold):
+    """Lines describing each pose against the baseline, and the names of regressed poses.
+
+    A baseline pose missing from the results counts as regressed: its detector is gone or broken.
+    """
+    lines, regressed = [], []
+    for name in baseline:
+        if name not in results:
+            regressed.append(name)
+            lines.append(f"{name:32} missing  REGRESSION")
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            lines.append(f"{name:32} new")
+            continue
+        latency = result["latency_us"]["best_p50"] / base["latency_us"]["best_p50"] - 1
+        # Allocation sizes are compared with 1 KiB of slack: small absolute changes are noise
+        alloc = (result["peak_alloc_bytes"] - base["peak_alloc_bytes"]) / max(base["peak_alloc_bytes"], 1024)
+        flag = latency > threshold or alloc > threshold
+        if flag:
+            regressed.append(name)
+        lines.append(f"{name:32} best p50 {latency:+7.1%}  alloc {alloc:+7.1%}{'  REGRESSION' if flag else ''}")
+    return lines, regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every registered pose detector.")
+    parser.add_argument("--frames", type=int, default=200, help="synthetic frames per pose (default 200)")
+    parser.add_argument("--recorded", help="benchmark recorded frames from an .npy, .npz or .rec file instead")
+    parser.add_argument("--repeat", type=int, default=3, help="timed passes over the frames (default 3)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pose", action="append", help="benchmark only this pose (repeatable)")
+    parser.add_argument("--out", help="write the results as JSON to this path")
+    parser.add_argument("--compare", help="baseline JSON to compare against; exit 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown, e.g. 0.10 for 10%%")
+    args = parser.parse_args()
+
+    names = [pose.upper() for pose in args.pose or ()]
+    try:
+        functions = detectors(PoseDetection(), names)
+        frames = load_frames(args.recorded) if args.recorded else synthetic_frames(args.frames, args.seed)
+    except ValueError as e:
+        sys.exit(str(e))
+    poses = benchmark(frames, args.repeat, functions=functions)
+    results = {
+        "meta": {
+            "source": args.recorded or f"synthetic:{args.frames}:{args.seed}",
+            "frames": len(frames),
+            "repeat": args.repeat,
+            "budget_ms": BUDGET_MS,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "poses": poses,
+    }
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+    for name, result in sorted(poses.items(), key=lambda item: -item[1]["latency_us"]["p50"]):
+        latency = result["latency_us"]
+        print(f"{name:32} {result['fps']:9.0f} fps  p50 {latency['p50']:8.1f} us  p99 {latency['p99']:8.1f} us  "
+              f"peak {result['peak_alloc_bytes'] / 1024:7.1f} KiB")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["poses"]
+        if names:
+            baseline = {name: base for name, base in baseline.items() if name in names}
+        lines, regressed = compare(poses, baseline, args.threshold)
+        print("\n".join(lines))
+        if regressed:
+            print(f"{len(regressed)} pose(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
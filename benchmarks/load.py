@@ -0,0 +1,256 @@
+"""End-to-end load test: simulated Socket.IO clients streaming frames to a local server.py.
+
+    python -m benchmarks.load --clients 50,100,200 --fps 30 --duration 20
+
+For each concurrency level the harness starts server.py (unless --url targets a running
+one), connects that many clients and has each stream frames of its pose at --fps. Clients
+send `ts` with every frame; the server echoes it in poseFeedback, which gives the round
+trip. Per level it reports latency percentiles, answered frames per second, frames never
+answered (dropped by the latest-frame mailbox) or answered after --deadline, and the CPU
+and RSS of the server's process tree. Needs the asyncio client of python-socketio
+(pip install aiohttp).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import urllib.request
+
+import numpy as np
+import socketio
+
+from poses import wire
+from .detectors import load_frames, synthetic_frames
+
+SERVER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "server.py")
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+class ClientStats:
+    """Frames sent and round trips of all clients of one level."""
+
+    def __init__(self):
+        self.sent = 0
+        self.latencies = []
+        self.errors = 0
+
+
+def landmark_dicts(frame):
+    """A (33, 4) frame as the JSON landmark list the browser sends."""
+    return [{"x": float(x), "y": float(y), "z": float(z), "visibility": float(v)} for x, y, z, v in frame]
+
+
+async def run_client(url, pose, frames, args, stats):
+    """Stream frames of one pose at args.fps for args.duration seconds, then wait for answers."""
+    client = socketio.AsyncClient(reconnection=False)
+    catalog = asyncio.get_running_loop().create_future()
+    pending = {}
+
+    @client.on("poseCatalog")
+    def on_catalog(data):
+        if not catalog.done():
+            catalog.set_result(data["poses"])
+
+    @client.on("poseFeedback")
+    def on_feedback(data):
+        sent_at = pending.pop(data.get("ts"), None)
+        if sent_at is not None:
+            stats.latencies.append(time.perf_counter() - sent_at)
+
+    try:
+        await client.connect(url, transports=["websocket"])
+        pose_id = (await asyncio.wait_for(catalog, 10)).index(pose)
+        # Each client replays the frames from its own offset, converted once up front
+        offset = random.randrange(len(frames))
+        order = [frames[(offset + i) % len(frames)] for i in range(min(len(frames), 300))]
+        payloads = [landmark_dicts(frame) for frame in order] if args.protocol == "json" else order
+
+        interval = 1.0 / args.fps
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + args.duration
+        next_at = loop.time()
+        ts = 0
+        while loop.time() < deadline:
+            payload = payloads[ts % len(payloads)]
+            pending[ts] = time.perf_counter()
+            if args.protocol == "json":
+                await client.emit("poseData", {"instructions": pose, "pose_landmarks": [payload], "ts": ts})
+            else:
+                await client.emit("poseFrame", wire.encode_frame(payload, pose_id, ts))
+            stats.sent += 1
+            ts += 1
+            next_at += interval
+            await asyncio.sleep(max(0.0, next_at - loop.time()))
+        await asyncio.sleep(args.drain)
+    except Exception as e:
+        stats.errors += 1
+        print(f"Client error: {e!r}", file=sys.stderr)
+    finally:
+        await client.disconnect()
+
+
+def process_tree(pid):
+    """pid and all its descendants, from /proc."""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            except OSError:
+                continue
+            children.setdefault(ppid, []).append(int(entry))
+    tree, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        tree.append(current)
+        stack.extend(children.get(current, ()))
+    return tree
+
+
+def cpu_and_rss(pid):
+    """Total CPU seconds and resident bytes of a process tree."""
+    cpu = rss = 0
+    for member in process_tree(pid):
+        try:
+            with open(f"/proc/{member}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            with open(f"/proc/{member}/statm") as f:
+                rss += int(f.read().split()[1]) * PAGE_SIZE
+        except OSError:
+            continue
+        cpu += (int(fields[11]) + int(fields[12])) / CLOCK_TICKS  # utime + stime
+    return cpu, rss
+
+
+async def sample_rss(pid, peak, stop):
+    while not stop.is_set():
+        peak[0] = max(peak[0], cpu_and_rss(pid)[1])
+        await asyncio.sleep(0.5)
+
+
+async def run_level(url, clients, poses, frames, args, server_pid):
+    stats = ClientStats()
+    peak_rss = [0]
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample_rss(server_pid, peak_rss, stop)) if server_pid else None
+    cpu_before = cpu_and_rss(server_pid)[0] if server_pid else 0
+    started = time.perf_counter()
+    tasks = []
+    for i in range(clients):
+        tasks.append(asyncio.create_task(run_client(url, poses[i % len(poses)], frames, args, stats)))
+        await asyncio.sleep(args.ramp / clients)  # Spread the connects and the frame phases
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    cpu = cpu_and_rss(server_pid)[0] - cpu_before if server_pid else None
+    stop.set()
+    if sampler:
+        await sampler
+
+    latencies = np.array(stats.latencies) * 1000
+    answered = len(latencies)
+    p50, p95, p99 = np.percentile(latencies, (50, 95, 99)) if answered else (None,) * 3
+    return {
+        "clients": clients,
+        "sent": stats.sent,
+        "answered": answered,
+        "dropped": stats.sent - answered,
+        "late": int((latencies > args.deadline).sum()),
+        "errors": stats.errors,
+        "throughput_fps": answered / args.duration,
+        "latency_ms": {"p50": p50, "p95": p95, "p99": p99},
+        "server_cpu_percent": cpu / elapsed * 100 if cpu is not None else None,
+        "server_rss_mb": peak_rss[0] / 2**20 if server_pid else None,
+    }
+
+
+def start_server(port, args):
+    """Start server.py with every frame analyzed and answered; returns the process once it serves."""
+    env = dict(os.environ, POSE_PORT=str(port), POSE_HEARTBEAT="0", POSE_LOG_LEVEL="WARNING")
+    if not args.cache:
+        env["POSE_CACHE_EPSILON"] = "0"
+    process = subprocess.Popen([sys.executable, SERVER], env=env)
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/stats", timeout=1)
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("server.py did not start")
+
+
+def parse_mix(text):
+    """"NAVASANA=3,AUTO=1" -> a list naming each pose as often as its weight."""
+    poses = []
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        poses.extend([name.strip().upper()] * int(weight or 1))
+    return poses
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test server.py with simulated Socket.IO clients.")
+    parser.add_argument("--clients", default="10,50,100", help="comma-separated concurrency levels")
+    parser.add_argument("--fps", type=float, default=30, help="frames per second per client")
+    parser.add_argument("--duration", type=float, default=15, help="seconds each client streams per level")
+    parser.add_argument("--ramp", type=float, default=2, help="seconds over which clients connect")
+    parser.add_argument("--drain", type=float, default=1, help="seconds to wait for answers after streaming")
+    parser.add_argument("--deadline", type=float, default=100, help="round trip in ms after which an answer is late")
+    parser.add_argument("--poses", default="NAVASANA=2,VAJRASANA=1,AUTO=1", help="pose mix as NAME=weight,...")
+    parser.add_argument("--protocol", choices=("json", "binary"), default="json", help="poseData or poseFrame events")
+    parser.add_argument("--recorded", help="replay recorded frames from an .npy, .npz or .rec file")
+    parser.add_argument("--cache", action="store_true", help="keep the held-pose cache on (off by default)")
+    parser.add_argument("--url", help="target a running server instead of starting server.py")
+    parser.add_argument("--server-pid", type=int, help="with --url, the pid to measure CPU and RSS of")
+    parser.add_argument("--port", type=int, default=5050, help="port of the started server.py")
+    parser.add_argument("--out", help="write the results as JSON to this path")
+    args = parser.parse_args()
+
+    try:
+        frames = load_frames(args.recorded) if args.recorded else synthetic_frames(300)
+    except ValueError as e:
+        sys.exit(str(e))
+    poses = parse_mix(args.poses)
+    levels = []
+    for clients in (int(level) for level in args.clients.split(",")):
+        # A fresh server per level, so one level's backlog does not spill into the next
+        process = None if args.url else start_server(args.port, args)
+        try:
+            url = args.url or f"http://127.0.0.1:{args.port}"
+            pid = args.server_pid if args.url else process.pid
+            result = asyncio.run(run_level(url, clients, poses, frames, args, pid))
+        finally:
+            if process:
+                process.terminate()
+                process.wait()
+        levels.append(result)
+        latency = result["latency_ms"]
+        print(f"{clients:5d} clients  {result['throughput_fps']:8.1f} fps answered  "
+              f"p50/p95/p99 {latency['p50'] or 0:7.1f} {latency['p95'] or 0:7.1f} {latency['p99'] or 0:7.1f} ms  "
+              f"dropped {result['dropped'] / max(result['sent'], 1):6.1%}  late {result['late']:6d}  "
+              f"cpu {result['server_cpu_percent'] or 0:5.0f}%  rss {result['server_rss_mb'] or 0:6.1f} MB")
+
+    # Capacity: the most clients served on time with under 1% of frames unanswered, per core used
+    healthy = [level for level in levels if level["sent"] and level["dropped"] / level["sent"] < 0.01
+               and level["latency_ms"]["p99"] is not None and level["latency_ms"]["p99"] <= args.deadline]
+    if healthy:
+        best = max(healthy, key=lambda level: level["clients"])
+        cores = (best["server_cpu_percent"] or 100) / 100
+        print(f"Capacity: {best['clients']} clients at {args.fps:g} fps within {args.deadline:g} ms p99, "
+              f"using {cores:.2f} cores ({best['clients'] / max(cores, 0.01):.0f} clients per core)")
+    else:
+        print("No level met the deadline with under 1% of frames unanswered")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"settings": vars(args), "levels": levels}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Run several server processes behind a local load balancer.
+
+    python cluster.py --processes 4
+
+The launcher starts a message queue broker on a UNIX socket, one server.py per process on
+consecutive ports after --port, and a TCP balancer on --port. The balancer pins each client
+IP to one process (IP hash), because a Socket.IO session and its pose state live in the
+process the client first reached. Emits to a sid still work from any process through the broker.
+"""
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import zlib
+
+import eventlet
+
+from poses import log
+from poses.log import CLUSTER
+from poses.message_queue import Broker
+
+SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "server.py")
+
+
+def pipe(source, destination):
+    """Copy bytes one way until either side closes."""
+    try:
+        while True:
+            data = source.recv(65536)
+            if not data:
+                break
+            destination.sendall(data)
+    except OSError:
+        pass
+    finally:
+        try:
+            destination.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+
+
+def proxy(client, address, backends):
+    """Relay a client connection to its process, or to the next live one if it is down."""
+    start = zlib.crc32(address[0].encode()) % len(backends)
+    upstream = None
+    for i in range(len(backends)):
+        try:
+            upstream = eventlet.connect(backends[(start + i) % len(backends)])
+            break
+        except OSError:
+            continue
+    if upstream is None:
+        CLUSTER.error("No server process reachable for %s", address[0])
+        client.close()
+        return
+    reply = eventlet.spawn(pipe, upstream, client)
+    pipe(client, upstream)
+    reply.wait()
+    upstream.close()
+    client.close()
+
+
+def balance(port, backends):
+    """Accept clients on port and hand each to its sticky backend."""
+    listener = eventlet.listen(("", port))
+    while True:
+        client, address = listener.accept()
+        eventlet.spawn_n(proxy, client, address, backends)
+
+
+def start_servers(count, first_port, queue_url):
+    """Start count server.py processes on consecutive ports, sharing the message queue."""
+    processes = []
+    for i in range(count):
+        env = dict(os.environ, POSE_PORT=str(first_port + i), POSE_MESSAGE_QUEUE=queue_url)
+        processes.append(subprocess.Popen([sys.executable, SERVER], env=env))
+    return processes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=os.cpu_count(), help="server processes (default: one per core)")
+    parser.add_argument("--port", type=int, default=5000, help="public port of the balancer")
+    parser.add_argument("--socket", default="/tmp/pose-detection-broker.sock", help="UNIX socket of the broker")
+    args = parser.parse_args()
+    log.configure()
+
+    eventlet.spawn_n(Broker(args.socket).serve)
+    eventlet.sleep(0)  # Bind the broker socket before the servers connect
+    processes = start_servers(args.processes, args.port + 1, f"unix://{args.socket}")
+    backends = [("127.0.0.1", args.port + 1 + i) for i in range(args.processes)]
+    CLUSTER.info("Balancing port %d over %d server processes", args.port, args.processes)
+    # Stop the servers on SIGTERM as on Ctrl-C
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        balance(args.port, backends)
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        for process in processes:
+            process.send_signal(signal.SIGTERM)
+        for process in processes:
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
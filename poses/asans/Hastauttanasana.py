@@ -1,80 +1,29 @@
-import numpy as np
-from .utils import calculate_angle
-
-# Function to detect the desired pose
-def detect_pose(landmarks):
-    try:
-        if landmarks:
-            detected_pose = {
-                "nose": np.array([landmarks[0]['x'], landmarks[0]['y']]),
-                "left_eye_inner": np.array([landmarks[1]['x'], landmarks[1]['y']]),
-                "left_eye": np.array([landmarks[2]['x'], landmarks[2]['y']]),
-                "left_eye_outer": np.array([landmarks[3]['x'], landmarks[3]['y']]),
-                "right_eye_inner": np.array([landmarks[4]['x'], landmarks[4]['y']]),
-                "right_eye": np.array([landmarks[5]['x'], landmarks[5]['y']]),
-                "right_eye_outer": np.array([landmarks[6]['x'], landmarks[6]['y']]),
-                "left_ear": np.array([landmarks[7]['x'], landmarks[7]['y']]),
-                "right_ear": np.array([landmarks[8]['x'], landmarks[8]['y']]),
-                "mouth_left": np.array([landmarks[9]['x'], landmarks[9]['y']]),
-                "mouth_right": np.array([landmarks[10]['x'], landmarks[10]['y']]),
-                "left_shoulder": np.array([landmarks[11]['x'], landmarks[11]['y']]),
-                "right_shoulder": np.array([landmarks[12]['x'], landmarks[12]['y']]),
-                "left_elbow": np.array([landmarks[13]['x'], landmarks[13]['y']]),
-                "right_elbow": np.array([landmarks[14]['x'], landmarks[14]['y']]),
-                "left_wrist": np.array([landmarks[15]['x'], landmarks[15]['y']]),
-                "right_wrist": np.array([landmarks[16]['x'], landmarks[16]['y']]),
-                "left_hip": np.array([landmarks[23]['x'], landmarks[23]['y']]),
-                "right_hip": np.array([landmarks[24]['x'], landmarks[24]['y']]),
-                "left_knee": np.array([landmarks[25]['x'], landmarks[25]['y']]),
-                "right_knee": np.array([landmarks[26]['x'], landmarks[26]['y']]),
-                "left_ankle": np.array([landmarks[27]['x'], landmarks[27]['y']]),
-                "right_ankle": np.array([landmarks[28]['x'], landmarks[28]['y']]),
-            }
-
-            # Set all landmarks as correct initially
-            correct = [1] * len(landmarks)
-            feedback_str = []
-
-            # Check for specific pose conditions and mark incorrect landmarks
-            left_shoulder_angle = calculate_angle(detected_pose["left_wrist"], detected_pose["left_shoulder"], detected_pose["left_hip"])
-            if not (150 <= left_shoulder_angle <= 200):
-                correct[11] = 0  # left_shoulder index
-                feedback_str.append("Adjust left shoulder angle.")
-
-            right_shoulder_angle = calculate_angle(detected_pose["right_wrist"], detected_pose["right_shoulder"], detected_pose["right_hip"])
-            if not (150 <= right_shoulder_angle <= 200):
-                correct[12] = 0  # right_shoulder index
-                feedback_str.append("Adjust right shoulder angle.")
-
-            angle_left_hand = calculate_angle(detected_pose["left_shoulder"], detected_pose["left_elbow"], detected_pose["left_wrist"])
-            if not (150 <= angle_left_hand <= 200):
-                correct[15] = 0  # left_wrist index
-                feedback_str.append("Adjust left wrist angle.")
-
-            angle_right_hand = calculate_angle(detected_pose["right_shoulder"], detected_pose["right_elbow"], detected_pose["right_wrist"])
-            if not (150 <= angle_right_hand <= 200):
-                correct[16] = 0  # right_wrist index
-                feedback_str.append("Adjust right wrist angle.")
-
-            # Legs
-            if not ((landmarks[23]['y'] < landmarks[27]['y']) and (landmarks[24]['y'] < landmarks[28]['y'])):
-                correct[25] = 0  # left_knee index
-                correct[26] = 0  # right_knee index
-                feedback_str.append("Keep knees straight.")
-
-            # Curve check
-            curve = calculate_angle(detected_pose["nose"], detected_pose["right_hip"], detected_pose["right_ankle"])
-            if not curve < 170:
-                correct[23] = 0  # left_hip index
-                correct[24] = 0  # right_hip index
-                feedback_str.append("Adjust hip position.")
-
-            accuracy = sum(correct) / len(correct) * 100
-            pose_name = "Hastauttanasana" if accuracy == 100 else "None"
-            feedback_str = " ".join(feedback_str) if feedback_str else "Good job!"
-
-            return accuracy, pose_name, correct, feedback_str
-
-    except Exception as e:
-        print(f"Error during pose detection: {e}")
-        return 0.0, "Error", [0] * len(landmarks), "Error"
+from .landmarks import NOSE, LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_ELBOW, RIGHT_ELBOW, LEFT_WRIST, RIGHT_WRIST, LEFT_HIP, RIGHT_HIP, LEFT_KNEE, RIGHT_KNEE, LEFT_ANKLE, RIGHT_ANKLE
+from .rules import Rule, angle, compile_rules, y
+
+POSE = compile_rules("Hastauttanasana", [
+    Rule(angle(LEFT_WRIST, LEFT_SHOULDER, LEFT_HIP).outside(150, 200), marks=[LEFT_SHOULDER],
+         message="Adjust left shoulder angle."),
+    Rule(angle(RIGHT_WRIST, RIGHT_SHOULDER, RIGHT_HIP).outside(150, 200), marks=[RIGHT_SHOULDER],
+         message="Adjust right shoulder angle."),
+    Rule(angle(LEFT_SHOULDER, LEFT_ELBOW, LEFT_WRIST).outside(150, 200), marks=[LEFT_WRIST],
+         message="Adjust left wrist angle."),
+    Rule(angle(RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST).outside(150, 200), marks=[RIGHT_WRIST],
+         message="Adjust right wrist angle."),
+    # Hips above the ankles
+    Rule((y(LEFT_HIP) >= y(LEFT_ANKLE)) | (y(RIGHT_HIP) >= y(RIGHT_ANKLE)), marks=[LEFT_KNEE, RIGHT_KNEE],
+         message="Keep knees straight."),
+    # Backward bend
+    Rule(angle(NOSE, RIGHT_HIP, RIGHT_ANKLE) >= 170, marks=[LEFT_HIP, RIGHT_HIP],
+         message="Adjust hip position."),
+], success="Good job!")
+
+
+# Function to detect the desired pose; the rules do not depend on orientation.
+def detect_pose(landmarks, orientation=None):
+    return POSE.detect(landmarks)
+
+
+# Score (N, 33, C) frames in one vectorized pass.
+def detect_batch(frames):
+    return POSE.detect_batch(frames)
@@ -1,74 +1,23 @@
-import numpy as np
-from .utils import calculate_angle, calculate_distance
+from .landmarks import LEFT_WRIST, RIGHT_WRIST, LEFT_HIP, RIGHT_HIP, LEFT_KNEE, RIGHT_KNEE, LEFT_ANKLE, RIGHT_ANKLE
+from .rules import HIP_WIDTH, Rule, angle, compile_rules, dist, y
 
-# Function to detect the desired pose
-def detect_pose(landmarks):
-    try:
-        if landmarks:
-            detected_pose = {
-                "nose": np.array([landmarks[0]['x'], landmarks[0]['y']]),
-                "left_eye_inner": np.array([landmarks[1]['x'], landmarks[1]['y']]),
-                "left_eye": np.array([landmarks[2]['x'], landmarks[2]['y']]),
-                "left_eye_outer": np.array([landmarks[3]['x'], landmarks[3]['y']]),
-                "right_eye_inner": np.array([landmarks[4]['x'], landmarks[4]['y']]),
-                "right_eye": np.array([landmarks[5]['x'], landmarks[5]['y']]),
-                "right_eye_outer": np.array([landmarks[6]['x'], landmarks[6]['y']]),
-                "left_ear": np.array([landmarks[7]['x'], landmarks[7]['y']]),
-                "right_ear": np.array([landmarks[8]['x'], landmarks[8]['y']]),
-                "mouth_left": np.array([landmarks[9]['x'], landmarks[9]['y']]),
-                "mouth_right": np.array([landmarks[10]['x'], landmarks[10]['y']]),
-                "left_shoulder": np.array([landmarks[11]['x'], landmarks[11]['y']]),
-                "right_shoulder": np.array([landmarks[12]['x'], landmarks[12]['y']]),
-                "left_elbow": np.array([landmarks[13]['x'], landmarks[13]['y']]),
-                "right_elbow": np.array([landmarks[14]['x'], landmarks[14]['y']]),
-                "left_wrist": np.array([landmarks[15]['x'], landmarks[15]['y']]),
-                "right_wrist": np.array([landmarks[16]['x'], landmarks[16]['y']]),
-                "left_hip": np.array([landmarks[23]['x'], landmarks[23]['y']]),
-                "right_hip": np.array([landmarks[24]['x'], landmarks[24]['y']]),
-                "left_knee": np.array([landmarks[25]['x'], landmarks[25]['y']]),
-                "right_knee": np.array([landmarks[26]['x'], landmarks[26]['y']]),
-                "left_ankle": np.array([landmarks[27]['x'], landmarks[27]['y']]),
-                "right_ankle": np.array([landmarks[28]['x'], landmarks[28]['y']]),
-            }
+POSE = compile_rules("Pranamasana", [
+    Rule(dist(LEFT_WRIST, RIGHT_WRIST) >= HIP_WIDTH / 2, marks=[LEFT_WRIST, RIGHT_WRIST],
+         message="Hands not touching"),
+    Rule((y(LEFT_HIP) >= y(LEFT_ANKLE)) | (y(RIGHT_HIP) >= y(RIGHT_ANKLE)), marks=[LEFT_KNEE, RIGHT_KNEE],
+         message="Legs not straight"),
+    Rule(angle(LEFT_HIP, LEFT_KNEE, LEFT_ANKLE).outside(150, 200), marks=[LEFT_KNEE],
+         message="Left knee angle incorrect"),
+    Rule(angle(RIGHT_HIP, RIGHT_KNEE, RIGHT_ANKLE).outside(150, 200), marks=[RIGHT_KNEE],
+         message="Right knee angle incorrect"),
+], separator=", ", success="Pose is correct")
 
-            # Set all landmarks as correct initially
-            correct = [1] * len(landmarks)
-            feedback = []
 
-            # Check for specific pose conditions and mark incorrect landmarks
-            left_wrist = detected_pose["left_wrist"]
-            right_wrist = detected_pose["right_wrist"]
-            hand_touch = np.linalg.norm(left_wrist - right_wrist) < calculate_distance(
-                [landmarks[23]['x'], landmarks[23]['y']], [landmarks[24]['x'], landmarks[24]['y']]
-            ) / 2
+# Function to detect the desired pose; the rules do not depend on orientation.
+def detect_pose(landmarks, orientation=None):
+    return POSE.detect(landmarks)
 
-            if not hand_touch:
-                correct[15] = 0  # LEFT_WRIST
-                correct[16] = 0  # RIGHT_WRIST
-                feedback.append("Hands not touching")
 
-            # Legs
-            if not ((landmarks[23]['y'] < landmarks[27]['y']) and (landmarks[24]['y'] < landmarks[28]['y'])):
-                correct[25] = 0  # LEFT_KNEE
-                correct[26] = 0  # RIGHT_KNEE
-                feedback.append("Legs not straight")
-
-            left_leg_curve = calculate_angle(detected_pose["left_hip"], detected_pose["left_knee"], detected_pose["left_ankle"])
-            if not (150 <= left_leg_curve <= 200):
-                correct[25] = 0  # LEFT_KNEE
-                feedback.append("Left knee angle incorrect")
-
-            right_leg_curve = calculate_angle(detected_pose["right_hip"], detected_pose["right_knee"], detected_pose["right_ankle"])
-            if not (150 <= right_leg_curve <= 200):
-                correct[26] = 0  # RIGHT_KNEE
-                feedback.append("Right knee angle incorrect")
-
-            accuracy = sum(correct) / len(correct) * 100
-            pose_name = "Pranamasana" if accuracy == 100 else "None"
-            feedback_str = ", ".join(feedback) if feedback else "Pose is correct"
-
-            return accuracy, pose_name, correct, feedback_str
-
-    except Exception as e:
-        print(f"Error during pose detection: {e}")
-        return 0.0, "Error", [0] * len(landmarks), "Error"
+# Score (N, 33, C) frames in one vectorized pass.
+def detect_batch(frames):
+    return POSE.detect_batch(frames)
@@ -0,0 +1,64 @@
+from collections import namedtuple
+
+import numpy as np
+
+from .landmarks import NUM_LANDMARKS
+
+# Result of scoring N frames against one pose:
+#   accuracy: (N,) float64, percentage of correct landmarks per frame (NaN for frames without a person)
+#   correct:  (N, 33) bool, the per-frame correctness masks
+#   codes:    (N,) int64 feedback codes, bit i set when checks[i] failed (-1 when unknown or without a person)
+#   checks:   tuple of check labels, one per feedback-code bit
+BatchResult = namedtuple("BatchResult", ["accuracy", "correct", "codes", "checks"])
+
+
+def check_frames(frames):
+    """Validate an (N, 33, C) frame array, C >= 2, and return it as an ndarray."""
+    frames = np.asarray(frames)
+    if frames.ndim != 3 or frames.shape[1] != NUM_LANDMARKS or frames.shape[2] < 2:
+        raise ValueError(f"Expected frames of shape (N, {NUM_LANDMARKS}, C>=2), got {frames.shape}")
+    return frames
+
+
+def present_frames(frames):
+    """(N,) bool, True for the frames whose landmarks are all finite.
+
+    Frames without a person are stored as NaN landmarks (see poses/video.py), and must not be scored.
+    """
+    return np.isfinite(frames).all(axis=(1, 2))
+
+
+def scatter(result, present):
+    """Spread a BatchResult of the present frames over all frames; the others get NaN accuracy and code -1."""
+    accuracy = np.full(len(present), np.nan)
+    accuracy[present] = result.accuracy
+    correct = np.zeros((len(present), NUM_LANDMARKS), dtype=bool)
+    correct[present] = result.correct
+    codes = np.full(len(present), -1, dtype=np.int64)
+    codes[present] = result.codes
+    return BatchResult(accuracy, correct, codes, result.checks)
+
+
+def bitmask(failed):
+    """Pack an (N, n_checks) bool array into (N,) int64 codes, check i in bit i."""
+    if failed.shape[-1] > 63:
+        raise ValueError(f"Too many checks for an int64 feedback code: {failed.shape[-1]}")
+    return failed.astype(np.int64) @ (np.int64(1) << np.arange(failed.shape[-1], dtype=np.int64))
+
+
+def detect_batch_fallback(detect_pose, frames):
+    """Score frames one at a time with a detector that has no vectorized batch path.
+
+    Such detectors only produce feedback text, so their codes are reported as -1.
+    """
+    frames = check_frames(frames)
+    accuracy = np.zeros(len(frames))
+    correct = np.zeros((len(frames), NUM_LANDMARKS), dtype=bool)
+    for i, frame in enumerate(frames):
+        result = detect_pose(frame)
+        if result is None:
+            continue
+        accuracy[i] = result[0]
+        if len(result[2]) == NUM_LANDMARKS:
+            correct[i] = result[2]
+    return BatchResult(accuracy, correct, np.full(len(frames), -1, dtype=np.int64), ())
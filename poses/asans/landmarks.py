@@ -0,0 +1,77 @@
+import numpy as np
+
+# MediaPipe pose landmark indices
+NOSE = 0
+LEFT_EYE_INNER = 1
+LEFT_EYE = 2
+LEFT_EYE_OUTER = 3
+RIGHT_EYE_INNER = 4
+RIGHT_EYE = 5
+RIGHT_EYE_OUTER = 6
+LEFT_EAR = 7
+RIGHT_EAR = 8
+MOUTH_LEFT = 9
+MOUTH_RIGHT = 10
+LEFT_SHOULDER = 11
+RIGHT_SHOULDER = 12
+LEFT_ELBOW = 13
+RIGHT_ELBOW = 14
+LEFT_WRIST = 15
+RIGHT_WRIST = 16
+LEFT_PINKY = 17
+RIGHT_PINKY = 18
+LEFT_INDEX = 19
+RIGHT_INDEX = 20
+LEFT_THUMB = 21
+RIGHT_THUMB = 22
+LEFT_HIP = 23
+RIGHT_HIP = 24
+LEFT_KNEE = 25
+RIGHT_KNEE = 26
+LEFT_ANKLE = 27
+RIGHT_ANKLE = 28
+LEFT_HEEL = 29
+RIGHT_HEEL = 30
+LEFT_FOOT_INDEX = 31
+RIGHT_FOOT_INDEX = 32
+
+NUM_LANDMARKS = 33
+
+# Lower-case landmark names, in index order
+LANDMARK_NAMES = (
+    "nose", "left_eye_inner", "left_eye", "left_eye_outer", "right_eye_inner", "right_eye",
+    "right_eye_outer", "left_ear", "right_ear", "mouth_left", "mouth_right", "left_shoulder",
+    "right_shoulder", "left_elbow", "right_elbow", "left_wrist", "right_wrist", "left_pinky",
+    "right_pinky", "left_index", "right_index", "left_thumb", "right_thumb", "left_hip",
+    "right_hip", "left_knee", "right_knee", "left_ankle", "right_ankle", "left_heel",
+    "right_heel", "left_foot_index", "right_foot_index",
+)
+
+# Columns of a landmark array
+X = 0
+Y = 1
+Z = 2
+VISIBILITY = 3
+LANDMARK_FIELDS = ("x", "y", "z", "visibility")
+
+
+def landmarks_to_array(landmarks):
+    """Convert one person's landmark payload into a contiguous float32 (33, 4) array.
+
+    The payload is the list of {'x', 'y', 'z', 'visibility'} dicts sent by the client;
+    a missing z defaults to 0 and a missing visibility to 1. Raises ValueError when the
+    payload does not hold 33 landmarks.
+    """
+    if landmarks is None or len(landmarks) < NUM_LANDMARKS:
+        raise ValueError(f"Expected {NUM_LANDMARKS} landmarks, got {0 if landmarks is None else len(landmarks)}")
+    try:
+        values = np.fromiter(
+            (value
+             for landmark in landmarks[:NUM_LANDMARKS]
+             for value in (landmark['x'], landmark['y'], landmark.get('z', 0.0), landmark.get('visibility', 1.0))),
+            dtype=np.float32,
+            count=NUM_LANDMARKS * len(LANDMARK_FIELDS),
+        )
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Malformed landmark payload: {e}") from e
+    return values.reshape(NUM_LANDMARKS, len(LANDMARK_FIELDS))
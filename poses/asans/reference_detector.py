@@ -0,0 +1,73 @@
+import logging
+
+import numpy as np
+
+from ..log import DETECTOR
+from ..profiler import lap
+from .batch import BatchResult, bitmask, check_frames
+from .landmarks import NOSE, LEFT_SHOULDER, RIGHT_SHOULDER, NUM_LANDMARKS
+from .utils import calculate_angles, classify_orientation, classify_orientations
+
+# Allowed deviation from the reference angle, in degrees
+ANGLE_THRESHOLD = 20
+
+
+# Function to detect a CSV-referenced pose and validate all of its angles.
+# orientation is the session's tracked orientation; it is classified from this frame when None.
+def detect_reference_pose(landmarks, reference, orientation=None):
+    feedback = []
+    if landmarks is None:
+        DETECTOR.debug("No landmarks detected")
+        return 0.0, "No pose detected", [0] * NUM_LANDMARKS, "No pose landmarks detected"
+
+    detected_pose = landmarks[:, :2]
+    DETECTOR.debug("Detected pose: %s", detected_pose)
+
+    direction = orientation or classify_orientation(detected_pose[NOSE], detected_pose[LEFT_SHOULDER], detected_pose[RIGHT_SHOULDER])
+
+    # Every reference triplet of the pose in a single call
+    joint_angles = calculate_angles(detected_pose, reference.triplets)
+    lap("angles")
+    if DETECTOR.isEnabledFor(logging.DEBUG):
+        DETECTOR.debug("Joint angles: %s", dict(zip(reference.keys, joint_angles.tolist())))
+
+    correct = np.ones(NUM_LANDMARKS, dtype=int)
+    ideal_angles = reference.for_orientation(direction)
+    if ideal_angles is not None:
+        # NaN ideals (no reference for this orientation) never compare as wrong
+        wrong = np.abs(joint_angles - ideal_angles) > ANGLE_THRESHOLD
+        correct[reference.triplets[wrong, 1]] = 0  # Mark the joint at the vertex as incorrect
+        lap("rules")
+        for i in np.flatnonzero(wrong):
+            ideal_angle = ideal_angles[i]
+            feedback.append(
+                f"Angle at {reference.keys[i]} should be between {ideal_angle - ANGLE_THRESHOLD:.2f} "
+                f"and {ideal_angle + ANGLE_THRESHOLD:.2f}, but is {joint_angles[i]:.2f}."
+            )
+
+    accuracy = correct.sum() / len(correct) * 100
+    pose_name = "Correct" if accuracy == 100 else "Incorrect"
+    feedback_str = ' '.join(feedback) if feedback else "Pose is correct"
+    lap("feedback")
+    return float(accuracy), pose_name, correct.tolist(), feedback_str
+
+
+def detect_reference_batch(frames, reference):
+    """Score (N, 33, C) frames against a CSV-referenced pose in one vectorized pass."""
+    frames = check_frames(frames)
+    points = frames[..., :2]
+
+    # Ideal angles per frame: one row per orientation plus a NaN row for "Uncertain" (-1)
+    ideal_by_orientation = np.vstack([reference.table.T, np.full(len(reference.keys), np.nan)])
+    ideal_angles = ideal_by_orientation[classify_orientations(points)]
+
+    joint_angles = calculate_angles(points, reference.triplets)
+    wrong = np.abs(joint_angles - ideal_angles) > ANGLE_THRESHOLD
+
+    # A landmark is incorrect when any failed triplet has it as its vertex
+    vertices = np.zeros((len(reference.keys), NUM_LANDMARKS), dtype=np.int32)
+    vertices[np.arange(len(reference.keys)), reference.triplets[:, 1]] = 1
+    correct = (wrong.astype(np.int32) @ vertices) == 0
+
+    accuracy = correct.mean(axis=1) * 100
+    return BatchResult(accuracy, correct, bitmask(wrong), reference.keys)
@@ -0,0 +1,225 @@
+import csv
+import hashlib
+import json
+import os
+import struct
+import sys
+
+import numpy as np
+
+from ..log import DETECTOR
+from .landmarks import NUM_LANDMARKS
+
+# Directory holding the reference-angle CSVs, resolved relative to this package
+CSV_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "CSV's")
+
+# Compiled form of CSV_DIR, produced by `python -m poses.asans.reference_store compile`
+COMPILED_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "reference_angles.bin")
+
+# Column order of the per-orientation angle arrays
+ORIENTATIONS = ("Front", "Right", "Left")
+
+# Cell values meaning "no reference angle for this orientation"
+MISSING_VALUES = ("", "N/A", "NA", "nan", "NaN")
+
+# Binary layout: magic, format version, header length, JSON header, padding, float64 table
+MAGIC = b"POSEREF\0"
+FORMAT_VERSION = 1
+_PREAMBLE = struct.Struct("<8sII")
+_ALIGNMENT = 64
+
+CSV_COLUMNS = ["Landmark Pair"] + [f"{orientation} (degrees)" for orientation in ORIENTATIONS]
+
+
+class PoseReference:
+    """Ideal joint angles of one pose, held as read-only numpy arrays."""
+
+    def __init__(self, name, keys, angles):
+        self.name = name
+        self.keys = tuple(keys)
+        # (n_triplets, 3) landmark indices, one row per "a_b_c" key
+        self.triplets = np.array([[int(i) for i in key.split('_')] for key in self.keys], dtype=np.intp)
+        self.triplets.setflags(write=False)
+        self._index = {key: i for i, key in enumerate(self.keys)}
+        # (n_triplets, 3) table with ORIENTATIONS as columns, plus one view per orientation;
+        # views of a read-only table stay read-only
+        self.table = angles
+        self.angles = {orientation: angles[:, column] for column, orientation in enumerate(ORIENTATIONS)}
+
+    def for_orientation(self, orientation):
+        """Return the ideal angles for an orientation, or None if it is unknown."""
+        return self.angles.get(orientation)
+
+    def get(self, key, orientation):
+        """Return the ideal angle for a landmark triplet key, or None."""
+        index = self._index.get(key)
+        values = self.angles.get(orientation)
+        if index is None or values is None or np.isnan(values[index]):
+            return None
+        return float(values[index])
+
+
+def _parse_angle(value):
+    value = value.strip()
+    return np.nan if value in MISSING_VALUES else float(value)
+
+
+def read_reference_csv(csv_path):
+    """Parse one reference CSV into its triplet keys and an (n, 3) angle array (NaN where missing)."""
+    keys = []
+    rows = []
+    with open(csv_path, newline='') as f:
+        for row in csv.DictReader(f):
+            keys.append(row['Landmark Pair'].strip())
+            rows.append([_parse_angle(row[f"{orientation} (degrees)"]) for orientation in ORIENTATIONS])
+    return keys, np.array(rows, dtype=np.float64).reshape(-1, len(ORIENTATIONS))
+
+
+def validate_reference_csv(csv_path):
+    """Parse a reference CSV strictly, raising ValueError on anything malformed."""
+    with open(csv_path, newline='') as f:
+        header = next(csv.reader(f), None)
+    if header is None or [column.strip() for column in header] != CSV_COLUMNS:
+        raise ValueError(f"{csv_path}: expected columns {CSV_COLUMNS}, got {header}")
+
+    try:
+        keys, angles = read_reference_csv(csv_path)
+    except (KeyError, ValueError) as e:
+        raise ValueError(f"{csv_path}: {e}") from e
+
+    if not keys:
+        raise ValueError(f"{csv_path}: no landmark rows")
+    seen = set()
+    for row, key in enumerate(keys, start=2):
+        parts = key.split('_')
+        if len(parts) != 3 or not all(p.isdigit() and int(p) < NUM_LANDMARKS for p in parts):
+            raise ValueError(f"{csv_path}:{row}: invalid landmark triplet {key!r}")
+        if key in seen:
+            raise ValueError(f"{csv_path}:{row}: duplicate landmark triplet {key!r}")
+        seen.add(key)
+    present = angles[~np.isnan(angles)]
+    if np.any((present < 0) | (present > 180)):
+        raise ValueError(f"{csv_path}: angles must lie between 0 and 180 degrees")
+    return keys, angles
+
+
+def _data_offset(header_len):
+    return -(-(_PREAMBLE.size + header_len) // _ALIGNMENT) * _ALIGNMENT
+
+
+def _csv_files(csv_dir):
+    for file_name in sorted(os.listdir(csv_dir)):
+        name, ext = os.path.splitext(file_name)
+        if ext.lower() == '.csv':
+            yield name, os.path.join(csv_dir, file_name)
+
+
+def source_digest(csv_dir=CSV_DIR):
+    """Hash the names and contents of the reference CSVs, to detect a stale compiled table."""
+    digest = hashlib.sha256()
+    for name, path in _csv_files(csv_dir):
+        with open(path, 'rb') as f:
+            digest.update(name.encode('utf-8') + b'\0' + f.read() + b'\0')
+    return digest.hexdigest()
+
+
+def compile_reference_store(csv_dir=CSV_DIR, out_path=COMPILED_PATH):
+    """Validate every reference CSV and write them as one pose x triplet x orientation table."""
+    poses = [(name, *validate_reference_csv(path)) for name, path in _csv_files(csv_dir)]
+
+    # Union of triplets over all poses, in first-seen order
+    triplets = []
+    for _, keys, _ in poses:
+        triplets.extend(key for key in keys if key not in triplets)
+    column = {key: i for i, key in enumerate(triplets)}
+
+    table = np.full((len(poses), len(triplets), len(ORIENTATIONS)), np.nan, dtype='<f8')
+    for p, (_, keys, angles) in enumerate(poses):
+        table[p, [column[key] for key in keys]] = angles
+
+    header = json.dumps({
+        "poses": [name for name, _, _ in poses],
+        "pose_triplets": [[column[key] for key in keys] for _, keys, _ in poses],
+        "triplets": triplets,
+        "orientations": list(ORIENTATIONS),
+        "shape": list(table.shape),
+        "source_digest": source_digest(csv_dir),
+    }).encode('utf-8')
+    data_offset = _data_offset(len(header))
+
+    tmp_path = out_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+        f.write(header)
+        f.write(b'\0' * (data_offset - _PREAMBLE.size - len(header)))
+        f.write(table.tobytes())
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+def read_compiled_header(path=COMPILED_PATH):
+    """Read and check the header of a compiled reference file."""
+    with open(path, 'rb') as f:
+        magic, version, header_len = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not a compiled reference file")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported format version {version}, recompile the references")
+        header = json.loads(f.read(header_len))
+    if header["orientations"] != list(ORIENTATIONS):
+        raise ValueError(f"{path}: unexpected orientation order {header['orientations']}")
+    return header_len, header
+
+
+def load_compiled_store(path=COMPILED_PATH):
+    """Map a compiled reference table read-only; forked workers share its pages."""
+    header_len, header = read_compiled_header(path)
+    data_offset = _data_offset(header_len)
+    table = np.memmap(path, dtype='<f8', mode='r', offset=data_offset, shape=tuple(header["shape"]))
+    store = {}
+    for p, name in enumerate(header["poses"]):
+        columns = header["pose_triplets"][p]
+        keys = [header["triplets"][c] for c in columns]
+        if columns == list(range(len(header["triplets"]))):
+            angles = table[p]
+        else:
+            angles = table[p, columns]
+            angles.setflags(write=False)
+        store[name] = PoseReference(name, keys, angles)
+    return store
+
+
+def load_reference_store(csv_dir=CSV_DIR, compiled_path=COMPILED_PATH):
+    """Load the reference store, preferring the compiled table unless the CSVs changed since it was built."""
+    if compiled_path and os.path.exists(compiled_path):
+        try:
+            _, header = read_compiled_header(compiled_path)
+        except ValueError as e:
+            DETECTOR.warning("Ignoring compiled references: %s", e)
+        else:
+            if header.get("source_digest") == source_digest(csv_dir):
+                return load_compiled_store(compiled_path)
+            DETECTOR.warning("%s is stale, parsing reference CSVs instead", compiled_path)
+
+    store = {}
+    for name, path in _csv_files(csv_dir):
+        keys, angles = read_reference_csv(path)
+        angles.setflags(write=False)
+        store[name] = PoseReference(name, keys, angles)
+    return store
+
+
+# Process-wide store, loaded once when the detectors are imported
+REFERENCE_STORE = load_reference_store()
+
+
+def get_reference(name):
+    """Return the preloaded reference for a pose name such as "1 Shwanasana"."""
+    return REFERENCE_STORE[name]
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] != ['compile']:
+        sys.exit("usage: python -m poses.asans.reference_store compile [csv_dir] [out_path]")
+    out = compile_reference_store(*sys.argv[2:4])
+    print(f"Compiled {len(load_compiled_store(out))} poses into {out}")
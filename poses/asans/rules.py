@@ -0,0 +1,315 @@
+"""Declarative pose rules compiled into vectorized numpy evaluation.
+
+A pose is described as a list of Rule objects. Each rule has a failure condition built from
+landmark features, the landmarks it marks wrong when it fails and a feedback message:
+
+    Rule(angle(LEFT_HIP, LEFT_KNEE, LEFT_ANKLE).outside(150, 200),
+         marks=[LEFT_KNEE], message="Left knee angle is not correct.")
+
+Conditions compare features (x, y, angle, dist, dist_to) against other features, scaled
+features or constants, and combine with `&`, `|` and `~`. compile_rules turns the rule list
+into index and incidence matrices once, so scoring any number of frames costs one feature
+pass, one comparison over all predicates and a few matrix products.
+"""
+import numpy as np
+
+from ..profiler import lap
+from .batch import BatchResult, bitmask, check_frames
+from .landmarks import LEFT_HIP, RIGHT_HIP, NUM_LANDMARKS
+from .utils import calculate_angles
+
+# Comparison operators of a predicate
+LT, LE, GT, GE = "<", "<=", ">", ">="
+_NEGATED = {LT: GE, LE: GT, GT: LE, GE: LT}
+
+
+class Feature:
+    """A scalar measured on every frame, such as a coordinate, an angle or a distance."""
+
+    def __init__(self, kind, args):
+        self.kind = kind
+        self.args = args
+
+    @property
+    def key(self):
+        return (self.kind, self.args)
+
+    def __mul__(self, factor):
+        return Scaled(self, factor)
+
+    def __truediv__(self, divisor):
+        return Scaled(self, 1.0 / divisor)
+
+    def __lt__(self, other):
+        return Predicate(self, LT, other)
+
+    def __le__(self, other):
+        return Predicate(self, LE, other)
+
+    def __gt__(self, other):
+        return Predicate(self, GT, other)
+
+    def __ge__(self, other):
+        return Predicate(self, GE, other)
+
+    def outside(self, low, high):
+        """Fails the closed range [low, high]."""
+        return (self < low) | (self > high)
+
+    def within(self, low, high):
+        """Lies in the closed range [low, high]."""
+        return (self >= low) & (self <= high)
+
+
+class Scaled:
+    """A feature multiplied by a constant, usable on the right-hand side of a comparison."""
+
+    def __init__(self, feature, factor):
+        self.feature = feature
+        self.factor = float(factor)
+
+
+# Constant feature used to compare against plain numbers
+ONE = Feature("one", ())
+
+
+def x(index):
+    return Feature("x", (index,))
+
+
+def y(index):
+    return Feature("y", (index,))
+
+
+def angle(a, b, c):
+    """Angle at b between a and c, in degrees."""
+    return Feature("angle", (a, b, c))
+
+
+def dist(a, b):
+    """Euclidean distance between two landmarks."""
+    return Feature("dist", (a, b))
+
+
+def dist_to(index, point):
+    """Euclidean distance from a landmark to a fixed (x, y) point."""
+    return Feature("dist_to", (index, tuple(float(v) for v in point)))
+
+
+# Distance between the hips, the usual length scale of the distance rules
+HIP_WIDTH = dist(LEFT_HIP, RIGHT_HIP)
+
+
+class Condition:
+    """Boolean combination of predicates."""
+
+    def __and__(self, other):
+        return All(self, other)
+
+    def __or__(self, other):
+        return Any(self, other)
+
+    def __invert__(self):
+        return self.negated()
+
+    def clauses(self):
+        """Return the condition in disjunctive normal form: a list of predicate lists."""
+        raise NotImplementedError
+
+
+class Predicate(Condition):
+    """Comparison `lhs op rhs`, where rhs is a feature, a scaled feature or a number."""
+
+    def __init__(self, lhs, op, rhs):
+        if not isinstance(lhs, Feature):
+            raise TypeError("The left-hand side of a rule predicate must be a feature")
+        if isinstance(rhs, Feature):
+            rhs = Scaled(rhs, 1.0)
+        elif not isinstance(rhs, Scaled):
+            rhs = Scaled(ONE, rhs)
+        self.lhs = lhs
+        self.op = op
+        self.rhs = rhs
+
+    @property
+    def key(self):
+        return (self.lhs.key, self.op, self.rhs.feature.key, self.rhs.factor)
+
+    def negated(self):
+        return Predicate(self.lhs, _NEGATED[self.op], self.rhs)
+
+    def clauses(self):
+        return [[self]]
+
+
+class All(Condition):
+    def __init__(self, *conditions):
+        self.conditions = conditions
+
+    def negated(self):
+        return Any(*(c.negated() for c in self.conditions))
+
+    def clauses(self):
+        result = [[]]
+        for condition in self.conditions:
+            result = [left + right for left in result for right in condition.clauses()]
+        return result
+
+
+class Any(Condition):
+    def __init__(self, *conditions):
+        self.conditions = conditions
+
+    def negated(self):
+        return All(*(c.negated() for c in self.conditions))
+
+    def clauses(self):
+        return [clause for condition in self.conditions for clause in condition.clauses()]
+
+
+class Rule:
+    """A failure condition, the landmarks it marks wrong and its feedback message.
+
+    restores lists landmarks set back to correct when the rule fails; restores are applied
+    after every rule has marked its landmarks.
+    """
+
+    def __init__(self, fails, marks=(), message=None, restores=()):
+        self.fails = fails
+        self.marks = tuple(marks)
+        self.message = message
+        self.restores = tuple(restores)
+
+
+class CompiledRules:
+    """A pose's rules compiled into index arrays and incidence matrices."""
+
+    def __init__(self, name, rules, separator=" ", success="Pose is correct", min_accuracy=100):
+        self.name = name
+        self.rules = tuple(rules)
+        self.separator = separator
+        self.success = success
+        self.min_accuracy = min_accuracy
+        self.messages = tuple(rule.message for rule in self.rules)
+        # Labels of the feedback-code bits
+        self.checks = tuple(rule.message or f"rule {i}" for i, rule in enumerate(self.rules))
+
+        # Deduplicate predicates and group them into per-rule DNF clauses
+        predicates = {}
+        clauses = []
+        clause_rule = []
+        for r, rule in enumerate(self.rules):
+            for clause in rule.fails.clauses():
+                clauses.append(sorted({predicates.setdefault(p.key, (len(predicates), p))[0] for p in clause}))
+                clause_rule.append(r)
+        predicates = [p for _, p in sorted(predicates.values(), key=lambda item: item[0])]
+
+        # Lay out the feature columns: x and y of every landmark, then derived features
+        self.angle_triplets = []
+        self.dist_pairs = []
+        self.point_dists = []
+        derived = {}
+        for p in predicates:
+            for feature in (p.lhs, p.rhs.feature):
+                if feature.kind == "angle" and feature.key not in derived:
+                    derived[feature.key] = ("angle", len(self.angle_triplets))
+                    self.angle_triplets.append(feature.args)
+                elif feature.kind == "dist" and feature.key not in derived:
+                    derived[feature.key] = ("dist", len(self.dist_pairs))
+                    self.dist_pairs.append(feature.args)
+                elif feature.kind == "dist_to" and feature.key not in derived:
+                    derived[feature.key] = ("dist_to", len(self.point_dists))
+                    self.point_dists.append(feature.args)
+        offsets = {"angle": 2 * NUM_LANDMARKS}
+        offsets["dist"] = offsets["angle"] + len(self.angle_triplets)
+        offsets["dist_to"] = offsets["dist"] + len(self.dist_pairs)
+        self.one_column = offsets["dist_to"] + len(self.point_dists)
+
+        def column(feature):
+            if feature.kind == "x":
+                return feature.args[0]
+            if feature.kind == "y":
+                return NUM_LANDMARKS + feature.args[0]
+            if feature.kind == "one":
+                return self.one_column
+            kind, index = derived[feature.key]
+            return offsets[kind] + index
+
+        self.angle_triplets = np.array(self.angle_triplets, dtype=np.intp).reshape(-1, 3)
+        self.dist_pairs = np.array(self.dist_pairs, dtype=np.intp).reshape(-1, 2)
+        self.point_indices = np.array([index for index, _ in self.point_dists], dtype=np.intp)
+        self.point_targets = np.array([point for _, point in self.point_dists], dtype=np.float32).reshape(-1, 2)
+
+        # Predicate i is `features[lhs[i]] op features[rhs[i]] * scale[i]`, evaluated as a
+        # (strict or non-strict) "less than" optionally negated
+        self.lhs = np.array([column(p.lhs) for p in predicates], dtype=np.intp)
+        self.rhs = np.array([column(p.rhs.feature) for p in predicates], dtype=np.intp)
+        self.scale = np.array([p.rhs.factor for p in predicates], dtype=np.float32)
+        self.strict = np.array([p.op in (LT, GE) for p in predicates], dtype=bool)
+        self.negate = np.array([p.op in (GT, GE) for p in predicates], dtype=bool)
+
+        # Incidence matrices: clause x predicate, rule x clause, rule x landmark
+        self.clause_predicates = np.zeros((len(clauses), len(predicates)), dtype=np.int32)
+        for k, clause in enumerate(clauses):
+            self.clause_predicates[k, clause] = 1
+        self.clause_sizes = self.clause_predicates.sum(axis=1)
+        self.rule_clauses = np.zeros((len(self.rules), len(clauses)), dtype=np.int32)
+        self.rule_clauses[clause_rule, np.arange(len(clauses))] = 1
+        self.marks = np.zeros((len(self.rules), NUM_LANDMARKS), dtype=np.int32)
+        self.restores = np.zeros((len(self.rules), NUM_LANDMARKS), dtype=np.int32)
+        for r, rule in enumerate(self.rules):
+            self.marks[r, list(rule.marks)] = 1
+            self.restores[r, list(rule.restores)] = 1
+
+    def features(self, frames):
+        """Compute the (N, n_features) feature matrix of (N, 33, C) frames."""
+        points = frames[..., :2]
+        n = len(frames)
+        return np.concatenate([
+            points[..., 0],
+            points[..., 1],
+            calculate_angles(points, self.angle_triplets),
+            np.linalg.norm(points[:, self.dist_pairs[:, 0]] - points[:, self.dist_pairs[:, 1]], axis=-1),
+            np.linalg.norm(points[:, self.point_indices] - self.point_targets, axis=-1),
+            np.ones((n, 1), dtype=points.dtype),
+        ], axis=1)
+
+    def evaluate(self, frames):
+        """Return the (N, n_rules) bool matrix of failed rules and the (N, 33) correct mask."""
+        features = self.features(frames)
+        lap("angles")
+        lhs = features[:, self.lhs]
+        rhs = features[:, self.rhs] * self.scale
+        truth = np.where(self.strict, lhs < rhs, lhs <= rhs) != self.negate
+        clause_true = (truth.astype(np.int32) @ self.clause_predicates.T) == self.clause_sizes
+        failed = (clause_true.astype(np.int32) @ self.rule_clauses.T) > 0
+
+        failed_int = failed.astype(np.int32)
+        correct = ((failed_int @ self.marks) == 0) | ((failed_int @ self.restores) > 0)
+        lap("rules")
+        return failed, correct
+
+    def detect_batch(self, frames):
+        """Score (N, 33, C) frames and return a BatchResult."""
+        failed, correct = self.evaluate(check_frames(frames))
+        accuracy = correct.mean(axis=1) * 100
+        return BatchResult(accuracy, correct, bitmask(failed), self.checks)
+
+    def detect(self, landmarks):
+        """Score one (33, C) landmark array; returns (accuracy, pose_name, correct, feedback)."""
+        if landmarks is None:
+            return 0.0, "No pose detected", [0] * NUM_LANDMARKS, "No pose landmarks detected"
+
+        failed, correct = self.evaluate(landmarks[np.newaxis])
+        failed, correct = failed[0], correct[0]
+        accuracy = float(correct.mean() * 100)
+        pose_name = self.name if accuracy >= self.min_accuracy else "None"
+        feedback = [self.messages[r] for r in np.flatnonzero(failed) if self.messages[r]]
+        feedback_str = self.separator.join(feedback) if feedback else self.success
+        lap("feedback")
+        return accuracy, pose_name, correct.astype(int).tolist(), feedback_str
+
+
+def compile_rules(name, rules, separator=" ", success="Pose is correct", min_accuracy=100):
+    """Compile a pose's rule list once into a CompiledRules evaluator."""
+    return CompiledRules(name, rules, separator=separator, success=success, min_accuracy=min_accuracy)
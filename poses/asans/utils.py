@@ -1,6 +1,8 @@
 import numpy as np
 import math
-import pandas as pd
+
+from ..log import DETECTOR
+from .reference_store import ORIENTATIONS, read_reference_csv
 
 
 def calculate_angle(point1, point2, point3):
@@ -17,7 +19,7 @@ def calculate_angle(point1, point2, point3):
 
         # Prevent division-by-zero errors
         if mag1 == 0 or mag2 == 0:
-            print("Degenerate vector found, returning 0 degrees")
+            DETECTOR.debug("Degenerate vector found, returning 0 degrees")
             return 0.0
 
         # Calculate the angle in radians
@@ -27,7 +29,7 @@ def calculate_angle(point1, point2, point3):
         return math.degrees(radians)
 
     except Exception as e:
-        print(f"Error calculating angle: {e}")
+        DETECTOR.warning("Error calculating angle: %s", e)
         return 0.0  # Return 0 degrees on error
 
 
@@ -58,94 +60,61 @@ def classify_orientation(nose, left_shoulder, right_shoulder):
     else:
         return "Uncertain"
 
-def calculate_joint_angles(landmarks_dict):
-    """Calculate specific joint angles based on given landmarks."""
-    angles = {}
-
-    def get_angle(point1, point2, point3):
-        """Helper function to calculate angle between three points."""
-        vec1 = point1 - point2  # Vector from point2 to point1
-        vec2 = point3 - point2  # Vector from point2 to point3
-
-        mag1 = np.linalg.norm(vec1)
-        mag2 = np.linalg.norm(vec2)
-
-        if mag1 == 0 or mag2 == 0:
-            print("Degenerate vector found, setting angle to 0 degrees.")
-            return 0.0
+def classify_orientations(landmarks):
+    """Vectorized classify_orientation over (..., 33, 2+) landmarks.
+
+    Returns indices into ORIENTATIONS, with -1 where the orientation is uncertain.
+    """
+    nose = landmarks[..., 0, :2]
+    left_shoulder = landmarks[..., 11, :2]
+    right_shoulder = landmarks[..., 12, :2]
+    delta = nose - (left_shoulder + right_shoulder) / 2
+    angle = np.abs(np.degrees(np.arctan2(delta[..., 1], delta[..., 0])))
+
+    front = (70 <= angle) & (angle <= 110)
+    left = ~front & (nose[..., 0] < left_shoulder[..., 0])
+    right = ~front & ~left & (nose[..., 0] > right_shoulder[..., 0])
+    orientation = np.full(front.shape, -1, dtype=np.intp)
+    orientation[front] = ORIENTATIONS.index("Front")
+    orientation[left] = ORIENTATIONS.index("Left")
+    orientation[right] = ORIENTATIONS.index("Right")
+    return orientation
+
+def calculate_angles(landmarks, triplets):
+    """Calculate the angle at the middle point of every landmark triplet, in one vectorized pass.
+
+    landmarks is a (..., 33, 2) or (..., 33, 3) array and triplets an (n, 3) int array of
+    (a, b, c) landmark indices; returns the (..., n) angles at b in degrees. Degenerate
+    triplets (a or c on top of b) give 0 degrees, as in calculate_angle.
+    """
+    points = np.asarray(landmarks)
+    triplets = np.asarray(triplets, dtype=np.intp)
+    vertex = points[..., triplets[:, 1], :]
+    vec1 = points[..., triplets[:, 0], :] - vertex
+    vec2 = points[..., triplets[:, 2], :] - vertex
+
+    dot = np.einsum('...i,...i->...', vec1, vec2)
+    norms = np.sqrt(np.einsum('...i,...i->...', vec1, vec1) * np.einsum('...i,...i->...', vec2, vec2))
+    degenerate = norms == 0
+    cos_angle = np.clip(dot / np.where(degenerate, 1, norms), -1.0, 1.0)  # Avoid numerical errors
+    angles = np.degrees(np.arccos(cos_angle))
+    angles[degenerate] = 0.0
+    return angles
 
-        cos_angle = np.dot(vec1, vec2) / (mag1 * mag2)
-        cos_angle = np.clip(cos_angle, -1.0, 1.0)  # Avoid numerical errors
-        return np.degrees(np.arccos(cos_angle))
+# Landmark triplets checked by calculate_joint_angles
+JOINT_ANGLE_KEYS = ('15_13_11', '12_14_16')
+JOINT_ANGLE_TRIPLETS = np.array([[15, 13, 11], [12, 14, 16]], dtype=np.intp)
 
-    try:
-        # Calculate angles for left and right elbows
-        angles['15_13_11'] = get_angle(
-            landmarks_dict['left_wrist'], 
-            landmarks_dict['left_elbow'], 
-            landmarks_dict['left_shoulder']
-        )
-        angles['12_14_16'] = get_angle(
-            landmarks_dict['right_shoulder'], 
-            landmarks_dict['right_elbow'], 
-            landmarks_dict['right_wrist']
-        )
-    except KeyError as e:
-        print(f"Missing landmark during angle calculation: {e}")
-    
-    print(f"Calculated angles: {angles}")
+def calculate_joint_angles(landmarks):
+    """Calculate specific joint angles from a (33, 2+) landmark array."""
+    angles = dict(zip(JOINT_ANGLE_KEYS, calculate_angles(landmarks[:, :2], JOINT_ANGLE_TRIPLETS).tolist()))
+    DETECTOR.debug("Calculated angles: %s", angles)
     return angles
 
 def load_angles_from_csv(csv_path):
     """Load ideal angles from a CSV file."""
-    df = pd.read_csv(csv_path)
-    angles_dict = {}
-    for _, row in df.iterrows():
-        angles_dict[row['Landmark Pair']] = {
-            'Front': row['Front (degrees)'],
-            'Right': row['Right (degrees)'],
-            'Left': row['Left (degrees)']
-        }
-    return angles_dict
-
-# Function to convert Mediapipe landmarks into a dictionary of NumPy arrays.
-def convert_landmarks_to_dict(landmarks):
-    try:
-        return {
-            "nose": np.array([landmarks[0].x, landmarks[0].y]),
-            "left_eye_inner": np.array([landmarks[1].x, landmarks[1].y]),
-            "left_eye": np.array([landmarks[2].x, landmarks[2].y]),
-            "left_eye_outer": np.array([landmarks[3].x, landmarks[3].y]),
-            "right_eye_inner": np.array([landmarks[4].x, landmarks[4].y]),
-            "right_eye": np.array([landmarks[5].x, landmarks[5].y]),
-            "right_eye_outer": np.array([landmarks[6].x, landmarks[6].y]),
-            "left_ear": np.array([landmarks[7].x, landmarks[7].y]),
-            "right_ear": np.array([landmarks[8].x, landmarks[8].y]),
-            "mouth_left": np.array([landmarks[9].x, landmarks[9].y]),
-            "mouth_right": np.array([landmarks[10].x, landmarks[10].y]),
-            "left_shoulder": np.array([landmarks[11].x, landmarks[11].y]),
-            "right_shoulder": np.array([landmarks[12].x, landmarks[12].y]),
-            "left_elbow": np.array([landmarks[13].x, landmarks[13].y]),
-            "right_elbow": np.array([landmarks[14].x, landmarks[14].y]),
-            "left_wrist": np.array([landmarks[15].x, landmarks[15].y]),
-            "right_wrist": np.array([landmarks[16].x, landmarks[16].y]),
-            "left_pinky": np.array([landmarks[17].x, landmarks[17].y]),
-            "right_pinky": np.array([landmarks[18].x, landmarks[18].y]),
-            "left_index": np.array([landmarks[19].x, landmarks[19].y]),
-            "right_index": np.array([landmarks[20].x, landmarks[20].y]),
-            "left_thumb": np.array([landmarks[21].x, landmarks[21].y]),
-            "right_thumb": np.array([landmarks[22].x, landmarks[22].y]),
-            "left_hip": np.array([landmarks[23].x, landmarks[23].y]),
-            "right_hip": np.array([landmarks[24].x, landmarks[24].y]),
-            "left_knee": np.array([landmarks[25].x, landmarks[25].y]),
-            "right_knee": np.array([landmarks[26].x, landmarks[26].y]),
-            "left_ankle": np.array([landmarks[27].x, landmarks[27].y]),
-            "right_ankle": np.array([landmarks[28].x, landmarks[28].y]),
-            "left_heel": np.array([landmarks[29].x, landmarks[29].y]),
-            "right_heel": np.array([landmarks[30].x, landmarks[30].y]),
-            "left_foot_index": np.array([landmarks[31].x, landmarks[31].y]),
-            "right_foot_index": np.array([landmarks[32].x, landmarks[32].y]),
-        }
-    except Exception as e:
-        print(f"Error converting landmarks: {e}")
-        return None
\ No newline at end of file
+    keys, angles = read_reference_csv(csv_path)
+    return {
+        key: {orientation: angles[i, column] for column, orientation in enumerate(ORIENTATIONS)}
+        for i, key in enumerate(keys)
+    }
@@ -0,0 +1,73 @@
+import os
+
+
+def _env_bool(name, default):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_float(name, default):
+    value = os.environ.get(name)
+    return default if value is None else float(value)
+
+
+def _env_levels(name):
+    value = os.environ.get(name, "")
+    pairs = (item.split("=", 1) for item in value.split(",") if "=" in item)
+    return {category.strip(): level.strip().upper() for category, level in pairs}
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return default if value is None else int(value)
+
+
+# Landmark smoothing (One Euro filter) applied per session before analysis; optional, off by default
+SMOOTHING = _env_bool("POSE_SMOOTHING", False)
+# Cutoff frequency in Hz while a landmark is still; lower means smoother but laggier
+SMOOTHING_MIN_CUTOFF = _env_float("POSE_SMOOTHING_MIN_CUTOFF", 1.0)
+# How fast the cutoff rises with landmark speed (normalized image units per second)
+SMOOTHING_BETA = _env_float("POSE_SMOOTHING_BETA", 5.0)
+# Cutoff frequency in Hz of the speed estimate
+SMOOTHING_D_CUTOFF = _env_float("POSE_SMOOTHING_D_CUTOFF", 1.0)
+# Gap in seconds after which the filter restarts from the raw landmarks
+SMOOTHING_RESET_AFTER = _env_float("POSE_SMOOTHING_RESET_AFTER", 1.0)
+
+# Reuse the last result while no landmark moved more than this (normalized units); 0 disables
+CACHE_EPSILON = _env_float("POSE_CACHE_EPSILON", 0.003)
+# Emit nothing, instead of the cached result, when a frame is served from the cache
+CACHE_SILENT = _env_bool("POSE_CACHE_SILENT", False)
+
+# Send an unchanged poseFeedback again after this many seconds; 0 sends every frame
+HEARTBEAT = _env_float("POSE_HEARTBEAT", 1.0)
+
+# Worker processes running the pose analysis off the event loop; 0 analyzes in the server process
+WORKERS = _env_int("POSE_WORKERS", 0)
+
+# Port the server listens on
+PORT = _env_int("POSE_PORT", 5000)
+# Message queue shared by several server processes (see poses/message_queue.py); empty for one process
+MESSAGE_QUEUE = os.environ.get("POSE_MESSAGE_QUEUE", "")
+
+# Level of every log category (see poses/log.py)
+LOG_LEVEL = os.environ.get("POSE_LOG_LEVEL", "INFO").upper()
+# Per-category overrides, e.g. "frames=DEBUG,detector=DEBUG"
+LOG_LEVELS = _env_levels("POSE_LOG_LEVELS")
+# Debug records per second let through from each logging call; 0 is unlimited
+LOG_RATE = _env_int("POSE_LOG_RATE", 10)
+# "text" or "json" (one object per line)
+LOG_FORMAT = os.environ.get("POSE_LOG_FORMAT", "text").lower()
+
+# Directory to record every session's frames and feedback into (see poses/recorder.py); empty disables
+RECORD_DIR = os.environ.get("POSE_RECORD_DIR", "")
+# Records buffered per session before they are handed to the background writer
+RECORD_BATCH = _env_int("POSE_RECORD_BATCH", 256)
+# Hand over a session's batch once its first record is this many seconds old, even if not full
+RECORD_FLUSH = _env_float("POSE_RECORD_FLUSH", 2.0)
+
+# Time the pipeline stages of every frame from startup (toggle at runtime via /debug/profile)
+PROFILE = _env_bool("POSE_PROFILE", False)
+# Frames per pose and stage the profile percentiles are computed over
+PROFILE_WINDOW = _env_int("POSE_PROFILE_WINDOW", 1000)
@@ -0,0 +1,51 @@
+import numpy as np
+
+from . import config
+from .asans.batch import bitmask
+
+
+class EmitCounters:
+    """poseFeedback payloads sent and suppressed as unchanged, per session or process-wide."""
+
+    def __init__(self):
+        self.emitted = 0
+        self.suppressed = 0
+
+    def as_dict(self):
+        return {"emitted": self.emitted, "suppressed": self.suppressed}
+
+
+# Totals over every session of this process
+TOTALS = EmitCounters()
+
+
+def correct_mask(correct):
+    """Pack a 33-element correctness list into an int, landmark i in bit i."""
+    return int(bitmask(np.asarray(correct, dtype=bool)[np.newaxis])[0])
+
+
+class FeedbackEmitter:
+    """A session's last emitted feedback; repeats it only as a heartbeat.
+
+    The correctness list goes out as a 33-bit mask, which fits a JavaScript number exactly.
+    """
+
+    def __init__(self, heartbeat=None):
+        self.heartbeat = config.HEARTBEAT if heartbeat is None else heartbeat
+        self.counters = EmitCounters()
+        self._last = None
+        self._last_at = None
+
+    def payload(self, result, now):
+        """Return the poseFeedback payload for result, or None when the client already shows it."""
+        accuracy, pose_name, correct, feedback_str = result
+        payload = {'accuracy': accuracy, 'text': pose_name, 'mask': correct_mask(correct), 'feedback': feedback_str}
+        if payload == self._last and self.heartbeat > 0 and now - self._last_at < self.heartbeat:
+            self.counters.suppressed += 1
+            TOTALS.suppressed += 1
+            return None
+        self._last = payload
+        self._last_at = now
+        self.counters.emitted += 1
+        TOTALS.emitted += 1
+        return payload
@@ -0,0 +1,58 @@
+import numpy as np
+
+from . import config
+from .asans.landmarks import NUM_LANDMARKS
+
+
+class CacheStats:
+    """Hit and miss counters, per session or process-wide."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self):
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate}
+
+
+# Totals over every session of this process
+TOTALS = CacheStats()
+
+
+class FrameCache:
+    """A session's last analyzed frame and its result, reused while the pose is held.
+
+    A lookup hits when the analysis key (pose, orientation) is unchanged and no landmark
+    moved more than epsilon in x or y since the analyzed frame.
+    """
+
+    def __init__(self, epsilon=None):
+        self.epsilon = config.CACHE_EPSILON if epsilon is None else epsilon
+        self.stats = CacheStats()
+        self.result = None
+        self._key = None
+        self._landmarks = np.zeros((NUM_LANDMARKS, 2), dtype=np.float32)
+        self._delta = np.zeros((NUM_LANDMARKS, 2), dtype=np.float32)
+
+    def lookup(self, key, landmarks):
+        """Return the cached result for this frame, or None when it must be analyzed."""
+        if self.result is not None and key == self._key:
+            np.subtract(landmarks[:, :2], self._landmarks, out=self._delta)
+            np.abs(self._delta, out=self._delta)
+            if self._delta.max() < self.epsilon:
+                self.stats.hits += 1
+                TOTALS.hits += 1
+                return self.result
+        self.stats.misses += 1
+        TOTALS.misses += 1
+        return None
+
+    def store(self, key, landmarks, result):
+        self._key = key
+        self._landmarks[:] = landmarks[:, :2]
+        self.result = result
@@ -0,0 +1,151 @@
+"""On-disk cache of the landmarks extracted from videos, so re-scoring skips MediaPipe.
+
+An entry holds every landmarked frame of one video for one model variant, keyed by the
+video's content hash (so a renamed or copied file still hits, and an edited one misses) and
+the variant: MediaPipe version, model complexity and frame size. Within an entry frames are
+looked up by index, so an entry made with stride s also serves every multiple of s, and a
+coarser run never replaces it.
+
+Entries are uncompressed .npz files of quantized landmarks, as in version 2 wire frames: x,
+y, z as int16 at wire.COORD_SCALE steps per unit and visibility as a byte, 231 bytes a frame
+instead of 528 as float32. The rounding, at most half a step, can move a result that sits
+right at a rule's threshold; stream_landmarks therefore yields the rounded landmarks on a
+miss too, so a cached video scores the same whether or not it was cached before. Reading an
+entry touches it; storing one evicts the least recently used entries until the cache fits
+its size bound. Content hashes are remembered by path, size and modification time, so an
+unchanged video is read only once.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from .wire import COORD_SCALE
+
+FORMAT = 1
+HASH_BLOCK = 1 << 20
+# Default size bound in bytes
+MAX_BYTES = 2 << 30
+
+
+def quantize(landmarks):
+    """(coords, visibility) of (..., 33, 4) float landmarks: int16 at COORD_SCALE steps, visibility in 1/255."""
+    coords = np.clip(np.rint(landmarks[..., :3] * COORD_SCALE), -32767, 32767).astype("<i2")
+    visibility = np.clip(np.rint(landmarks[..., 3] * 255), 0, 255).astype(np.uint8)
+    return coords, visibility
+
+
+def dequantize(coords, visibility):
+    """float32 (..., 33, 4) landmarks of quantize's output."""
+    landmarks = np.empty(visibility.shape + (4,), dtype=np.float32)
+    np.multiply(coords, 1.0 / COORD_SCALE, out=landmarks[..., :3], casting="unsafe")
+    np.multiply(visibility, 1.0 / 255, out=landmarks[..., 3], casting="unsafe")
+    return landmarks
+
+
+class LandmarkCache:
+    """Landmarks of videos by (content hash, variant), in a directory bounded to max_bytes."""
+
+    def __init__(self, directory, max_bytes=MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._hashes_path = os.path.join(directory, "hashes.json")
+        try:
+            with open(self._hashes_path) as f:
+                self._hashes = json.load(f)
+        except (OSError, ValueError):
+            self._hashes = {}
+
+    def content_hash(self, path):
+        """SHA-256 of the file's content; reused while its size and modification time are unchanged."""
+        stat = os.stat(path)
+        key = os.path.realpath(path)
+        known = self._hashes.get(key)
+        if known and known[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return known[2]
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(HASH_BLOCK), b""):
+                digest.update(block)
+        self._hashes[key] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        self._write_hashes()
+        return digest.hexdigest()
+
+    def _write_hashes(self):
+        tmp_path = self._hashes_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._hashes, f)
+        os.replace(tmp_path, self._hashes_path)
+
+    def _entry_path(self, digest, variant):
+        return os.path.join(self.directory, f"{digest}-{variant}.npz")
+
+    def load(self, digest, variant, stride=1):
+        """(indices, times, landmarks) for every stride-th frame, or None on a miss.
+
+        landmarks is a list of float32 (33, 4) arrays, None where nobody was found.
+        """
+        path = self._entry_path(digest, variant)
+        try:
+            with np.load(path) as entry:
+                if int(entry["format"]) != FORMAT or stride % int(entry["stride"]):
+                    return None
+                indices = entry["index"]
+                keep = indices % stride == 0
+                indices, times, present = indices[keep], entry["time"][keep], entry["present"][keep]
+                coords, visibility = entry["coords"][keep], entry["visibility"][keep]
+        except (OSError, KeyError, ValueError):
+            return None
+        os.utime(path)  # Most recently used
+
+        landmarks = dequantize(coords, visibility)
+        return indices, times, [frame if found else None for frame, found in zip(landmarks, present)]
+
+    def _stored_stride(self, path):
+        try:
+            with np.load(path) as entry:
+                return int(entry["stride"]) if int(entry["format"]) == FORMAT else None
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def store(self, digest, variant, stride, indices, times, landmarks):
+        """Store the frames of one video and variant, then evict down to the size bound.
+
+        landmarks is an (N, 33, 4) float32 array, NaN for frames without a person. An entry
+        whose stride divides this one already holds every frame, and is kept instead.
+        """
+        path = self._entry_path(digest, variant)
+        stored = self._stored_stride(path)
+        if stored is not None and stride % stored == 0:
+            os.utime(path)
+            return
+        present = ~np.isnan(landmarks[:, 0, 0])
+        coords, visibility = quantize(np.where(present[:, None, None], landmarks, 0))
+
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, format=FORMAT, stride=stride, index=np.asarray(indices, dtype=np.int64),
+                 time=np.asarray(times, dtype=np.float64), present=present, coords=coords, visibility=visibility)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        """Delete the least recently used entries until the cache fits max_bytes."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".npz") and not name.endswith(".tmp.npz"):
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except OSError:
+                    continue  # Evicted by another process meanwhile
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(os.path.join(self.directory, name))
+            except OSError:
+                pass
+            total -= size
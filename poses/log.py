@@ -0,0 +1,106 @@
+"""Logging categories of the server, configured from the POSE_LOG_* variables.
+
+Each category is a logger under "pose", with its own level. configure() routes them all
+through a queue: the calling thread only enqueues the unformatted record, and a background
+thread formats and writes it. A disabled debug call costs one cached level check, so guard
+only the calls whose arguments are expensive to build (isEnabledFor).
+"""
+import atexit
+import json
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+import numpy as np
+
+from . import config
+
+# Connections, protocol errors and failures
+SERVER = logging.getLogger("pose.server")
+# Per-frame events; debug only
+FRAMES = logging.getLogger("pose.frames")
+# Detector internals such as landmarks and joint angles; debug only
+DETECTOR = logging.getLogger("pose.detector")
+# Launcher, balancer and message queue
+CLUSTER = logging.getLogger("pose.cluster")
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s %(message)s"
+
+# Attributes every LogRecord has; anything else was passed through extra=
+_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener = None
+
+
+class RateLimitFilter(logging.Filter):
+    """Lets at most `rate` DEBUG records per second through from each call site; 0 is unlimited.
+
+    The first record after a limited second carries the number dropped as `suppressed`.
+    """
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+        self._windows = {}  # (pathname, lineno) -> [second, records seen in it]
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.rate <= 0:
+            return True
+        site = (record.pathname, record.lineno)
+        second = int(record.created)
+        window = self._windows.get(site)
+        if window is None or window[0] != second:
+            if window is not None and window[1] > self.rate:
+                record.suppressed = window[1] - self.rate
+            window = self._windows[site] = [second, 0]
+        window[1] += 1
+        return window[1] <= self.rate
+
+
+class LazyQueueHandler(QueueHandler):
+    """Enqueues records unformatted, leaving the formatting to the listener thread."""
+
+    def prepare(self, record):
+        # Snapshot array arguments: hot-path buffers are overwritten by the next frame
+        if isinstance(record.args, tuple) and record.args:
+            record.args = tuple(arg.copy() if isinstance(arg, np.ndarray) else arg for arg in record.args)
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including the fields passed through extra=."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "category": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_FIELDS)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure():
+    """Apply the configured levels and start the background log writer; safe to call twice."""
+    global _listener
+    if _listener is not None:
+        return
+    root = logging.getLogger("pose")
+    root.setLevel(config.LOG_LEVEL)
+    for category, level in config.LOG_LEVELS.items():
+        logging.getLogger(f"pose.{category}").setLevel(level)
+
+    writer = logging.StreamHandler()
+    writer.setFormatter(JsonFormatter() if config.LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT))
+    records = queue.SimpleQueue()
+    handler = LazyQueueHandler(records)
+    handler.addFilter(RateLimitFilter(config.LOG_RATE))
+    root.addHandler(handler)
+    root.propagate = False
+
+    _listener = QueueListener(records, writer)
+    _listener.start()
+    atexit.register(_listener.stop)
@@ -0,0 +1,42 @@
+class FrameCounters:
+    """Frames received, dropped unprocessed and processed, per session or process-wide."""
+
+    def __init__(self):
+        self.received = 0
+        self.dropped = 0
+        self.processed = 0
+
+    def as_dict(self):
+        return {"received": self.received, "dropped": self.dropped, "processed": self.processed}
+
+
+# Totals over every session of this process
+TOTALS = FrameCounters()
+
+
+class Mailbox:
+    """Single-slot, latest-frame-wins mailbox.
+
+    put() replaces a frame that was not taken yet, counting it as dropped, so the consumer
+    always works on the freshest frame and never falls behind a fast sender.
+    """
+
+    def __init__(self):
+        self.counters = FrameCounters()
+        self._item = None
+
+    def put(self, item):
+        if self._item is not None:
+            self.counters.dropped += 1
+            TOTALS.dropped += 1
+        self._item = item
+        self.counters.received += 1
+        TOTALS.received += 1
+
+    def take(self):
+        """Remove and return the pending frame, or None."""
+        item, self._item = self._item, None
+        if item is not None:
+            self.counters.processed += 1
+            TOTALS.processed += 1
+        return item
@@ -0,0 +1,99 @@
+"""Socket.IO client managers for running several server processes.
+
+POSE_MESSAGE_QUEUE selects the backend: a unix:// path uses the bundled broker below (started
+by cluster.py), redis:// uses python-socketio's RedisManager and any other URL its
+KombuManager. Either way, sio.emit(..., room=sid) reaches the client from every process.
+"""
+import json
+import os
+import socket
+
+import eventlet
+import socketio
+
+# Seconds between attempts to reach the broker
+RETRY_INTERVAL = 1.0
+
+
+def client_manager(url, write_only=False):
+    """Create the client manager for a message queue URL."""
+    if url.startswith("unix://"):
+        return UnixSocketManager(url[len("unix://"):], write_only=write_only)
+    if url.startswith(("redis://", "rediss://")):
+        return socketio.RedisManager(url, write_only=write_only)
+    return socketio.KombuManager(url, write_only=write_only)
+
+
+class UnixSocketManager(socketio.PubSubManager):
+    """Pub/sub client manager speaking newline-delimited JSON to a local Broker."""
+
+    name = "unix"
+
+    def __init__(self, path, channel="socketio", write_only=False, logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.path = path
+        self._sock = None
+
+    def _connect(self):
+        if self._sock is None:
+            self._sock = eventlet.connect(self.path, family=socket.AF_UNIX)
+        return self._sock
+
+    def _disconnect(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def _publish(self, data):
+        line = json.dumps({"channel": self.channel, "data": data}).encode() + b"\n"
+        try:
+            self._connect().sendall(line)
+        except OSError:
+            # The broker restarted; retry once on a fresh connection
+            self._disconnect()
+            self._connect().sendall(line)
+
+    def _listen(self):
+        while True:
+            try:
+                reader = self._connect().makefile("rb")
+                for line in reader:
+                    message = json.loads(line)
+                    if message.get("channel") == self.channel:
+                        yield message["data"]
+            except OSError as e:
+                self._get_logger().error(f"Message queue broker unreachable at {self.path}: {e}")
+            self._disconnect()
+            eventlet.sleep(RETRY_INTERVAL)
+
+
+class Broker:
+    """Relays every line a connected server publishes to all connected servers, itself included."""
+
+    def __init__(self, path):
+        self.path = path
+        self.clients = set()
+
+    def serve(self):
+        """Accept and relay until the process exits; run it in its own green thread."""
+        if os.path.exists(self.path):
+            os.unlink(self.path)  # A stale socket from an earlier run
+        listener = eventlet.listen(self.path, family=socket.AF_UNIX)
+        while True:
+            client, _ = listener.accept()
+            self.clients.add(client)
+            eventlet.spawn_n(self._relay, client)
+
+    def _relay(self, client):
+        try:
+            for line in client.makefile("rb"):
+                for other in list(self.clients):
+                    try:
+                        other.sendall(line)
+                    except OSError:
+                        self.clients.discard(other)
+        except OSError:
+            pass
+        finally:
+            self.clients.discard(client)
+            client.close()
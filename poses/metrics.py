@@ -0,0 +1,163 @@
+"""In-process metrics registry, exposed in the Prometheus text format at /metrics.
+
+Updates are plain int and float additions without locks: every update happens on a green
+thread of the server's one OS thread, and green threads only switch at I/O. Values that
+already live elsewhere (mailbox, cache and feedback counters, session count) are read when
+the metrics are scraped, so they cost nothing per frame.
+"""
+from bisect import bisect_left
+
+# Histogram buckets for analysis latency and event loop lag, in seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+# Histogram buckets for emitted packet sizes, in bytes
+SIZE_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 16384)
+# Histogram buckets for per-session frame rates, in frames per second
+RATE_BUCKETS = (1, 5, 10, 15, 20, 25, 30, 45, 60)
+
+REGISTRY = []
+
+
+def _format_labels(names, values, extra=""):
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Metric:
+    """A metric family; labels(...) returns the child for one combination of label values."""
+
+    kind = "untyped"
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._children = {}
+        REGISTRY.append(self)
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = self._new_child()
+        return child
+
+    def samples(self):
+        """Yield (suffix, label values, extra label, value) for the exposition."""
+        raise NotImplementedError
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, values, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(self.label_names, values, extra)} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Collected(Metric):
+    """A counter or gauge whose samples come from collect(), called at scrape time.
+
+    collect returns a value, or a list of (label values, value) pairs.
+    """
+
+    def __init__(self, name, help, collect, kind="gauge", labels=()):
+        super().__init__(name, help, labels)
+        self.kind = kind
+        self.collect = collect
+
+    def samples(self):
+        values = self.collect()
+        if not isinstance(values, list):
+            values = [((), values)]
+        for label_values, value in values:
+            yield "", label_values, "", value
+
+
+class _Buckets:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, buckets, labels=()):
+        self.buckets = tuple(buckets)
+        super().__init__(name, help, labels)
+
+    def _new_child(self):
+        return _Buckets(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def samples(self):
+        for values, child in list(self._children.items()):
+            yield from self._bucket_samples(values, child.counts, child.sum)
+
+    def _bucket_samples(self, values, counts, total):
+        cumulative = 0
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            yield "_bucket", values, f'le="{bound}"', cumulative
+        cumulative += counts[-1]
+        yield "_bucket", values, 'le="+Inf"', cumulative
+        yield "_sum", values, "", total
+        yield "_count", values, "", cumulative
+
+
+class CollectedHistogram(Histogram):
+    """A histogram rebuilt at scrape time from the values collect() returns."""
+
+    def __init__(self, name, help, buckets, collect):
+        super().__init__(name, help, buckets)
+        self.collect = collect
+
+    def samples(self):
+        buckets = _Buckets(self.buckets)
+        for value in self.collect():
+            buckets.observe(value)
+        yield from self._bucket_samples((), buckets.counts, buckets.sum)
+
+
+class FrameRate:
+    """Exponentially weighted frames per second of one session, updated per received frame."""
+
+    def __init__(self, weight=0.1):
+        self.weight = weight
+        self.interval = None
+        self._last = None
+
+    def tick(self, t):
+        if self._last is not None:
+            interval = t - self._last
+            self.interval = interval if self.interval is None else self.interval + self.weight * (interval - self.interval)
+        self._last = t
+
+    @property
+    def fps(self):
+        return 1.0 / self.interval if self.interval else 0.0
+
+
+def expose():
+    """The whole registry in the Prometheus text format."""
+    return "\n".join(metric.expose() for metric in REGISTRY) + "\n"
+
+
+ANALYSIS_SECONDS = Histogram("pose_analysis_seconds", "Time spent analyzing a frame, by pose.",
+                             LATENCY_BUCKETS, labels=("pose",))
+EMIT_BYTES = Histogram("pose_emit_bytes", "Size of the Socket.IO packets sent to clients.", SIZE_BUCKETS)
+EVENT_LOOP_LAG = Histogram("pose_event_loop_lag_seconds",
+                           "How late the event loop resumed a sleeping green thread.", LATENCY_BUCKETS)
@@ -0,0 +1,74 @@
+import numpy as np
+
+from .asans.landmarks import NOSE, LEFT_SHOULDER, RIGHT_SHOULDER, X, Y, Z
+from .asans.utils import classify_orientation
+
+# Shoulder depth difference, relative to shoulder width, beyond which the body counts as turned
+TURN_ENTER = 0.5
+# Smaller turn that still keeps an already turned body turned (hysteresis band)
+TURN_EXIT = 0.3
+# Consecutive frames a new orientation must persist before the tracker switches to it
+HOLD_FRAMES = 3
+
+
+def estimate_turn(landmarks):
+    """Signed body turn from shoulder depth, > 0 with the left side toward the camera.
+
+    Returns None when the landmarks carry no depth (z all zero) or the shoulders coincide.
+    """
+    left = landmarks[LEFT_SHOULDER]
+    right = landmarks[RIGHT_SHOULDER]
+    if left[Z] == 0 and right[Z] == 0:
+        return None
+    width = float(np.hypot(left[X] - right[X], left[Y] - right[Y]))
+    if width == 0:
+        return None
+    return float(right[Z] - left[Z]) / width
+
+
+class OrientationTracker:
+    """Per-session orientation estimate that is stable from frame to frame.
+
+    Uses shoulder depth with a hysteresis band when z is available, and the 2D
+    classify_orientation otherwise. A new orientation is only adopted after it persists for
+    hold_frames frames, and "Uncertain" frames keep the last known orientation.
+    """
+
+    def __init__(self, enter=TURN_ENTER, exit=TURN_EXIT, hold_frames=HOLD_FRAMES):
+        self.enter = enter
+        self.exit = exit
+        self.hold_frames = hold_frames
+        self.orientation = "Uncertain"
+        self._candidate = None
+        self._count = 0
+
+    def classify(self, landmarks):
+        """Orientation of a single (33, C) frame, given the current state."""
+        turn = estimate_turn(landmarks) if landmarks.shape[1] > Z else None
+        if turn is None:
+            return classify_orientation(landmarks[NOSE, :2], landmarks[LEFT_SHOULDER, :2], landmarks[RIGHT_SHOULDER, :2])
+
+        # Leaving a turned orientation needs the turn to drop below the smaller exit threshold
+        if turn > self.enter or (self.orientation == "Left" and turn > self.exit):
+            return "Left"
+        if turn < -self.enter or (self.orientation == "Right" and turn < -self.exit):
+            return "Right"
+        return "Front"
+
+    def update(self, landmarks):
+        """Feed one frame and return the tracked orientation."""
+        observed = self.classify(landmarks)
+        if observed == "Uncertain" or observed == self.orientation:
+            self._candidate, self._count = None, 0
+        elif self.orientation == "Uncertain":
+            self.orientation = observed  # Nothing to hold on to yet
+        else:
+            self._count = self._count + 1 if observed == self._candidate else 1
+            self._candidate = observed
+            if self._count >= self.hold_frames:
+                self.orientation, self._candidate, self._count = observed, None, 0
+        return self.orientation
+
+    def reset(self):
+        self.orientation = "Uncertain"
+        self._candidate, self._count = None, 0
@@ -1,116 +1,169 @@
 # poses/asans/pose_detection.py
-from .asans.parvatasana import detect_parvatasana
-from .asans.AnandaBalasana import detect_pose as detect_ananda_balasan
-from .asans.ArdhaChakrasana import detect_pose as detect_ardha_chakrasana
-from .asans.ArdhaPadmasana import detect_pose as detect_ardha_padmasana
-from .asans.Bhujangasana import detect_pose as detect_bhujangasana
-from .asans.Hastauttanasana import detect_pose as detect_hastauttanasana
-from .asans.navasana import detect_pose as detect_navasana
-from .asans.Phalakasana import detect_pose as detect_phalakasana
-from .asans.Paschimottanasana import detect_pose as detect_paschimottanasana
-from .asans.Pranamasana import detect_pose as detect_pranamasana
-from .asans.purvamatsyasana import detect_pose as detect_purvamatsyasana
-from .asans.savasana import detect_pose as detect_savasana
-from .asans.setubandasana import detect_pose as detect_setubandasana
-from .asans.Supta_Baddha_Konasana import detect_pose as detect_supta_baddha_konasana
-from .asans.SuptaMatsyendrasana import detect_pose as detect_supta_matsyendrasana
-from .asans.svanasana import detect_pose as detect_svanasana
-from .asans.Utkatasana import detect_pose as detect_utkatasana
-from .asans.Uttanasana import detect_pose as detect_uttanasana
-from .asans.ViparitaKarani import detect_pose as detect_viparita_karani
-from .asans.vajrasana import detect_pose as detect_vajrasana
-from .asans.Virabhadrasana_I import detect_pose as detect_virabhadrasana_I
-from .asans.Virabhadrasana_II import detect_pose as detect_virabhadrasana_II
-from .asans._1_Shwanasana import detect_pose as detect_pose_1_Shwanasana
-from .asans._2_Marjarasana_A import detect_pose as detect_pose_2_Marjarasana_A
-from .asans._3_Marjarasana_B import detect_pose as detect_pose_3_Marjarasana_B
-from .asans._4_Tripad_marjarasana_1 import detect_pose as detect_pose_4_Tripad_marjarasana_1
-from .asans._4_Tripad_marjarasana_2 import detect_pose as detect_pose_4_Tripad_marjarasana_2
-from .asans._5_Swastikasana import detect_pose as detect_pose_5_Swastikasana
-from .asans._6_Hastapadasana import detect_pose as detect_pose_6_Hastapadasana
-from .asans._7_Ardha_shalabhasana_1 import detect_pose as detect_pose_7_Ardha_shalabhasana_1
-from .asans._7_Ardha_shalabhasana_2 import detect_pose as detect_pose_7_Ardha_shalabhasana_2
-from .asans._8_Uttitha_ekapadasana_1 import detect_pose as detect_pose_8_Uttitha_ekapadasana_1
-from .asans._8_Uttitha_ekapadasana_2 import detect_pose as detect_pose_8_Uttitha_ekapadasana_2
-from .asans._9_Ardha_pavan_muktasana_1 import detect_pose as detect_pose_9_Ardha_pavan_muktasana_1
-from .asans._9_Ardha_pavan_muktasana_2 import detect_pose as detect_pose_9_Ardha_pavan_muktasana_2
-from .asans._10_Uttana_vakrasana import detect_pose as detect_pose_10_Uttana_vakrasana
-from .asans._11_Uttana_tadasana import detect_pose as detect_pose_11_Uttana_tadasana
-from .asans._12_dwipadasana import detect_pose as detect_pose_12_dwipadasana
-from .asans._13_left_Ardha_padmasana import detect_pose as detect_pose_13_left_Ardha_padmasana
-from .asans._14_left_eka_pada_hastasana import detect_pose as detect_pose_14_left_eka_pada_hastasana
-from .asans._15_Left_Janushirasana import detect_pose as detect_pose_15_Left_Janushirasana
-from .asans._16_Left_Vakrasana import detect_pose as detect_pose_16_Left_Vakrasana
-from .asans._17_Pavan_muktasana import detect_pose as detect_pose_17_Pavan_muktasana
-from .asans._18_Right_ardha_padmasana import detect_pose as detect_pose_18_Right_ardha_padmasana
-from .asans._19_right_Janushirasana import detect_pose as detect_pose_19_right_Janushirasana
-from .asans._20_Right_vakrasana import detect_pose as detect_pose_20_Right_vakrasana
-from .asans._21_Vajrasana import detect_pose as detect_pose_21_Vajrasana
-from .asans._22_Viparita_Karni_mudra import detect_pose as detect_pose_22_Viparita_Karni_mudra
-# from .another_pose import detect_another_pose   # Add other poses here
+from .asans import (  # Add other pose modules here
+    parvatasana,
+    AnandaBalasana,
+    ArdhaChakrasana,
+    ArdhaPadmasana,
+    Bhujangasana,
+    Hastauttanasana,
+    navasana,
+    Phalakasana,
+    Paschimottanasana,
+    Pranamasana,
+    purvamatsyasana,
+    savasana,
+    setubandasana,
+    Supta_Baddha_Konasana,
+    SuptaMatsyendrasana,
+    svanasana,
+    Utkatasana,
+    Uttanasana,
+    ViparitaKarani,
+    vajrasana,
+    Virabhadrasana_I,
+    Virabhadrasana_II,
+    _1_Shwanasana,
+    _2_Marjarasana_A,
+    _3_Marjarasana_B,
+    _4_Tripad_marjarasana_1,
+    _4_Tripad_marjarasana_2,
+    _5_Swastikasana,
+    _6_Hastapadasana,
+    _7_Ardha_shalabhasana_1,
+    _7_Ardha_shalabhasana_2,
+    _8_Uttitha_ekapadasana_1,
+    _8_Uttitha_ekapadasana_2,
+    _9_Ardha_pavan_muktasana_1,
+    _9_Ardha_pavan_muktasana_2,
+    _10_Uttana_vakrasana,
+    _11_Uttana_tadasana,
+    _12_dwipadasana,
+    _13_left_Ardha_padmasana,
+    _14_left_eka_pada_hastasana,
+    _15_Left_Janushirasana,
+    _16_Left_Vakrasana,
+    _17_Pavan_muktasana,
+    _18_Right_ardha_padmasana,
+    _19_right_Janushirasana,
+    _20_Right_vakrasana,
+    _21_Vajrasana,
+    _22_Viparita_Karni_mudra,
+)
+from .asans.batch import check_frames, detect_batch_fallback, present_frames, scatter
+from .pose_matcher import PoseMatcher
+from .profiler import lap
+
+# Instructions value that recognizes the pose instead of checking a chosen one
+AUTO_POSE = "AUTO"
 
 class PoseDetection:
     def __init__(self):
-        # Map instructions to their respective pose detection functions
-        self.pose_functions = {
-            "PARVATASANA": detect_parvatasana,
-            "ANANDA_BALASANA": detect_ananda_balasan,
-            "ARDHA_CHAKRASANA": detect_ardha_chakrasana,
-            "ARDHA_PADMASANA": detect_ardha_padmasana,
-            "BHUJANGASANA": detect_bhujangasana,
-            "HASTAUTTANASANA": detect_hastauttanasana,
-            "NAVASANA": detect_navasana,
-            "PHALAKASANA": detect_phalakasana,
-            "PASCHIMOTTANASANA": detect_paschimottanasana,
-            "PRANAMASANA": detect_pranamasana,
-            "PURVAMATSYASANA": detect_purvamatsyasana,
-            "SAVASANA": detect_savasana,
-            "SETUBANDASANA": detect_setubandasana,
-            "SUPTA_BADDHA_KONASANA": detect_supta_baddha_konasana,
-            "SUPTA_MATSYENDRASANA": detect_supta_matsyendrasana,
-            "SVANASANA": detect_svanasana,
-            "UTKATASANA": detect_utkatasana,
-            "UTTANASANA": detect_uttanasana,
-            "VIPARITA_KARANI": detect_viparita_karani,
-            "VAJRASANA": detect_vajrasana,
-            "VIRABHADRASANA_I": detect_virabhadrasana_I,
-            "VIRABHADRASANA_II": detect_virabhadrasana_II,
+        # Map instructions to their respective pose detection modules
+        self.pose_modules = {
+            "PARVATASANA": parvatasana,
+            "ANANDA_BALASANA": AnandaBalasana,
+            "ARDHA_CHAKRASANA": ArdhaChakrasana,
+            "ARDHA_PADMASANA": ArdhaPadmasana,
+            "BHUJANGASANA": Bhujangasana,
+            "HASTAUTTANASANA": Hastauttanasana,
+            "NAVASANA": navasana,
+            "PHALAKASANA": Phalakasana,
+            "PASCHIMOTTANASANA": Paschimottanasana,
+            "PRANAMASANA": Pranamasana,
+            "PURVAMATSYASANA": purvamatsyasana,
+            "SAVASANA": savasana,
+            "SETUBANDASANA": setubandasana,
+            "SUPTA_BADDHA_KONASANA": Supta_Baddha_Konasana,
+            "SUPTA_MATSYENDRASANA": SuptaMatsyendrasana,
+            "SVANASANA": svanasana,
+            "UTKATASANA": Utkatasana,
+            "UTTANASANA": Uttanasana,
+            "VIPARITA_KARANI": ViparitaKarani,
+            "VAJRASANA": vajrasana,
+            "VIRABHADRASANA_I": Virabhadrasana_I,
+            "VIRABHADRASANA_II": Virabhadrasana_II,
 
-            "SHWANASANA": detect_pose_1_Shwanasana,
-            "MARJARASANA_A": detect_pose_2_Marjarasana_A,
-            "MARJARASANA_B": detect_pose_3_Marjarasana_B,
-            "TRIPAD_MARJARASANA_1": detect_pose_4_Tripad_marjarasana_1,
-            "TRIPAD_MARJARASANA_2": detect_pose_4_Tripad_marjarasana_2,
-            "SWASTIKASANA": detect_pose_5_Swastikasana,
-            "HASTAPADASANA": detect_pose_6_Hastapadasana,
-            "ARDHA_SHALABHASANA_1": detect_pose_7_Ardha_shalabhasana_1,
-            "ARDHA_SHALABHASANA_2": detect_pose_7_Ardha_shalabhasana_2,
-            "UTTITHA_EKAPADASANA_1": detect_pose_8_Uttitha_ekapadasana_1,
-            "UTTITHA_EKAPADASANA_2": detect_pose_8_Uttitha_ekapadasana_2,
-            "ARDHA_PAVAN_MUKTASANA_1": detect_pose_9_Ardha_pavan_muktasana_1,
-            "ARDHA_PAVAN_MUKTASANA_2": detect_pose_9_Ardha_pavan_muktasana_2,
-            "UTTANA_VAKRASANA": detect_pose_10_Uttana_vakrasana,
-            "UTTANA_TADASANA": detect_pose_11_Uttana_tadasana,
-            "DWIPADASANA": detect_pose_12_dwipadasana,
-            "LEFT_ARDHA_PADMASANA": detect_pose_13_left_Ardha_padmasana,
-            "LEFT_EKA_PADA_HASTASANA": detect_pose_14_left_eka_pada_hastasana,
-            "LEFT_JANUSHIRASANA": detect_pose_15_Left_Janushirasana,
-            "LEFT_VAKRASANA": detect_pose_16_Left_Vakrasana,
-            "PAVAN_MUKTASANA": detect_pose_17_Pavan_muktasana,
-            "RIGHT_ARDHA_PADMASANA": detect_pose_18_Right_ardha_padmasana,
-            "RIGHT_JANUSHIRASANA": detect_pose_19_right_Janushirasana,
-            "RIGHT_VAKRASANA": detect_pose_20_Right_vakrasana,
-            "VAJRASANA_NEW": detect_pose_21_Vajrasana,
-            "VIPARITA_KARNI_MUDRA": detect_pose_22_Viparita_Karni_mudra,
+            "SHWANASANA": _1_Shwanasana,
+            "MARJARASANA_A": _2_Marjarasana_A,
+            "MARJARASANA_B": _3_Marjarasana_B,
+            "TRIPAD_MARJARASANA_1": _4_Tripad_marjarasana_1,
+            "TRIPAD_MARJARASANA_2": _4_Tripad_marjarasana_2,
+            "SWASTIKASANA": _5_Swastikasana,
+            "HASTAPADASANA": _6_Hastapadasana,
+            "ARDHA_SHALABHASANA_1": _7_Ardha_shalabhasana_1,
+            "ARDHA_SHALABHASANA_2": _7_Ardha_shalabhasana_2,
+            "UTTITHA_EKAPADASANA_1": _8_Uttitha_ekapadasana_1,
+            "UTTITHA_EKAPADASANA_2": _8_Uttitha_ekapadasana_2,
+            "ARDHA_PAVAN_MUKTASANA_1": _9_Ardha_pavan_muktasana_1,
+            "ARDHA_PAVAN_MUKTASANA_2": _9_Ardha_pavan_muktasana_2,
+            "UTTANA_VAKRASANA": _10_Uttana_vakrasana,
+            "UTTANA_TADASANA": _11_Uttana_tadasana,
+            "DWIPADASANA": _12_dwipadasana,
+            "LEFT_ARDHA_PADMASANA": _13_left_Ardha_padmasana,
+            "LEFT_EKA_PADA_HASTASANA": _14_left_eka_pada_hastasana,
+            "LEFT_JANUSHIRASANA": _15_Left_Janushirasana,
+            "LEFT_VAKRASANA": _16_Left_Vakrasana,
+            "PAVAN_MUKTASANA": _17_Pavan_muktasana,
+            "RIGHT_ARDHA_PADMASANA": _18_Right_ardha_padmasana,
+            "RIGHT_JANUSHIRASANA": _19_right_Janushirasana,
+            "RIGHT_VAKRASANA": _20_Right_vakrasana,
+            "VAJRASANA_NEW": _21_Vajrasana,
+            "VIPARITA_KARNI_MUDRA": _22_Viparita_Karni_mudra,
             # Add other pose mappings here
-            # "another_pose": detect_another_pose,
+            # "another_pose": another_pose,
         }
-    def analyze_pose(self, instructions, landmarks):
-        """ Analyze the provided pose landmarks based on instructions. """
+        self.pose_functions = {name: module.detect_pose for name, module in self.pose_modules.items()}
+        self.matcher = PoseMatcher(self.pose_modules)
+        # Pose ids of the binary wire protocol index into this catalog
+        self.pose_catalog = (AUTO_POSE,) + tuple(self.pose_modules)
+
+    def analyze_pose(self, instructions, landmarks, orientation=None):
+        """ Analyze a (33, 4) float32 landmark array (x, y, z, visibility) based on instructions.
+
+        orientation is the session's tracked orientation, shared by every detector; detectors
+        classify the frame themselves when it is None.
+        """
+        if instructions.upper() == AUTO_POSE:
+            return self.analyze_auto(landmarks, orientation=orientation)[:4]
+
         pose_function = self.pose_functions.get(instructions.upper())
 
         if pose_function is None:
             return 0.0, "Unknown pose", [] , ''  # Handle unknown instructions gracefully
         
-        accuracy, pose_name, correct , feedback_str = pose_function(landmarks)
+        accuracy, pose_name, correct , feedback_str = pose_function(landmarks, orientation)
         return accuracy, pose_name, correct , feedback_str
+
+    def analyze_auto(self, landmarks, k=3, orientation=None):
+        """ Recognize the pose by scoring the frame against every registered pose at once.
+
+        The best match is then checked by its own detector for the correctness mask and feedback.
+        Returns (accuracy, pose_name, correct, feedback_str, matches), matches being the top-k
+        (pose name, score) pairs.
+        """
+        matches = self.matcher.top_k(landmarks, k, orientation)
+        lap("matching")
+        pose_name = matches[0][0]
+        accuracy, _, correct, feedback_str = self.pose_functions[pose_name](landmarks, orientation)
+        summary = ", ".join(f"{name} {score * 100:.0f}%" for name, score in matches)
+        return accuracy, pose_name, correct, f"Best matches: {summary}. {feedback_str}", matches
+
+    def analyze_batch(self, instructions, frames):
+        """ Analyze an (N, 33, C) array of frames against one pose in vectorized form.
+
+        Returns a BatchResult of per-frame accuracy, correctness masks and feedback codes.
+        Frames with non-finite landmarks (nobody found) are not scored: they get NaN accuracy,
+        an all-False mask and code -1. Raises ValueError for an unknown pose or a badly shaped array.
+        """
+        pose_module = self.pose_modules.get(instructions.upper())
+        if pose_module is None:
+            raise ValueError(f"Unknown pose: {instructions}")
+
+        frames = check_frames(frames)
+        present = present_frames(frames)
+        if not present.all():
+            return scatter(self.analyze_batch(instructions, frames[present]), present)
+        detect_batch = getattr(pose_module, "detect_batch", None)
+        if detect_batch is None:
+            return detect_batch_fallback(pose_module.detect_pose, frames)
+        return detect_batch(frames)
@@ -0,0 +1,84 @@
+import numpy as np
+
+from .asans.batch import check_frames
+from .asans.reference_detector import ANGLE_THRESHOLD
+from .asans.reference_store import ORIENTATIONS
+from .asans.rules import CompiledRules
+from .asans.utils import calculate_angles, classify_orientations
+
+
+class PoseMatcher:
+    """Score frames against every registered pose at once.
+
+    Poses backed by reference angles are stacked into (pose, triplet, orientation) tolerance
+    bands over the union of their triplets; poses backed by rules are merged into a single
+    compiled rule set. A frame's score for a pose is the fraction of that pose's checks it
+    passes, so both kinds are comparable.
+    """
+
+    def __init__(self, pose_modules):
+        references = []
+        rule_sets = []
+        for name, module in pose_modules.items():
+            if getattr(module, "REFERENCE", None) is not None:
+                references.append((name, module.REFERENCE))
+            elif getattr(module, "POSE", None) is not None:
+                rule_sets.append((name, module.POSE))
+        self.names = tuple(name for name, _ in references) + tuple(name for name, _ in rule_sets)
+
+        # Tolerance bands over the union of reference triplets; NaN where a pose has no reference
+        keys = []
+        for _, reference in references:
+            keys.extend(key for key in reference.keys if key not in keys)
+        column = {key: i for i, key in enumerate(keys)}
+        self.triplets = np.array([[int(i) for i in key.split('_')] for key in keys], dtype=np.intp).reshape(-1, 3)
+        ideal = np.full((len(references), len(keys), len(ORIENTATIONS)), np.nan)
+        for p, (_, reference) in enumerate(references):
+            ideal[p, [column[key] for key in reference.keys]] = reference.table
+        self.low = ideal - ANGLE_THRESHOLD
+        self.high = ideal + ANGLE_THRESHOLD
+        self.check_counts = (~np.isnan(ideal)).sum(axis=1)  # (pose, orientation)
+
+        # Every rule of every rule-based pose, compiled together so shared predicates run once
+        rules = [rule for _, compiled in rule_sets for rule in compiled.rules]
+        self.rules = CompiledRules("AUTO", rules)
+        self.rule_owner = np.zeros((len(rule_sets), len(rules)), dtype=np.int32)
+        start = 0
+        for p, (_, compiled) in enumerate(rule_sets):
+            self.rule_owner[p, start:start + len(compiled.rules)] = 1
+            start += len(compiled.rules)
+        self.rule_counts = self.rule_owner.sum(axis=1)
+
+    def _reference_scores(self, points, orientation=None):
+        angles = calculate_angles(points, self.triplets)[:, np.newaxis, :, np.newaxis]
+        passed = ((angles >= self.low) & (angles <= self.high)).sum(axis=2)  # (N, pose, orientation)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            scores = np.nan_to_num(passed / self.check_counts)
+
+        # Use the tracked or per-frame orientation, or the best orientation when it is uncertain
+        if orientation is None:
+            orientation = classify_orientations(points)
+        else:
+            orientation = np.full(len(points), ORIENTATIONS.index(orientation) if orientation in ORIENTATIONS else -1)
+        best = scores.max(axis=2)
+        known = orientation >= 0
+        best[known] = scores[known, :, orientation[known]]
+        return best
+
+    def _rule_scores(self, frames):
+        failed, _ = self.rules.evaluate(frames)
+        return 1 - (failed.astype(np.int32) @ self.rule_owner.T) / self.rule_counts
+
+    def score(self, frames, orientation=None):
+        """Return the (N, n_poses) fraction of checks passed, columns ordered as self.names.
+
+        orientation, when given, is used for every frame instead of classifying each one.
+        """
+        frames = check_frames(frames)
+        return np.hstack([self._reference_scores(frames[..., :2], orientation), self._rule_scores(frames)])
+
+    def top_k(self, landmarks, k=3, orientation=None):
+        """Return the k best matching (pose name, score) pairs for one (33, C) landmark array."""
+        scores = self.score(landmarks[np.newaxis], orientation)[0]
+        order = np.argsort(-scores, kind='stable')[:k]
+        return [(self.names[i], float(scores[i])) for i in order]
@@ -0,0 +1,100 @@
+"""Per-stage timing of the frame pipeline, reported per pose at /debug/profile.
+
+A frame's stages are timed as laps: each lap(stage) adds the time since the previous lap to
+that stage, and stop(timer) records one sample per stage of the frame. The server starts a
+timer for each frame it analyzes and laps it itself; sessions interleave at every green thread
+switch, so a timer is only made current, through active(), around a synchronous detector call.
+Detectors lap the current timer through the module-level lap(), so they need no timer argument.
+While the profiler is disabled timers are no-ops and a lap costs one method call.
+"""
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+from . import config
+
+PERCENTILES = (50, 95, 99)
+
+
+class _NullTimer:
+    def lap(self, stage):
+        pass
+
+
+NULL_TIMER = _NullTimer()
+
+
+class Timer:
+    """Per-stage time of one frame of one pose."""
+
+    def __init__(self, pose):
+        self.pose = pose
+        self.stages = {}
+        self.last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + now - self.last
+        self.last = now
+
+
+class Profiler:
+    """Sliding windows of the last `window` durations of every (pose, stage)."""
+
+    def __init__(self, window=None, enabled=None):
+        self.window = config.PROFILE_WINDOW if window is None else window
+        self.enabled = config.PROFILE if enabled is None else enabled
+        self.current = NULL_TIMER
+        self._samples = {}
+
+    def set_enabled(self, enabled):
+        """Toggle at runtime; enabling starts from empty windows."""
+        if enabled and not self.enabled:
+            self._samples = {}
+        self.enabled = enabled
+
+    def start(self, pose):
+        """A new timer for one frame of pose, or the no-op timer while disabled."""
+        return Timer(pose) if self.enabled else NULL_TIMER
+
+    def stop(self, timer):
+        """Record the stages of a timer returned by start()."""
+        if timer is not NULL_TIMER:
+            for stage, seconds in timer.stages.items():
+                self.record(timer.pose, stage, seconds)
+
+    @contextmanager
+    def active(self, timer):
+        """Make timer the one lap() laps, for a block that must not yield to another green thread."""
+        self.current = timer
+        try:
+            yield timer
+        finally:
+            self.current = NULL_TIMER
+
+    def record(self, pose, stage, seconds):
+        samples = self._samples.get((pose, stage))
+        if samples is None:
+            samples = self._samples[(pose, stage)] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def report(self):
+        """{pose: {stage: {"count", "p50_ms", "p95_ms", "p99_ms"}}} over the current windows."""
+        poses = {}
+        for (pose, stage), samples in list(self._samples.items()):
+            values = np.percentile(np.fromiter(samples, dtype=np.float64), PERCENTILES) * 1000
+            entry = {"count": len(samples)}
+            entry.update((f"p{p}_ms", round(float(v), 4)) for p, v in zip(PERCENTILES, values))
+            poses.setdefault(pose, {})[stage] = entry
+        return poses
+
+
+# Process-wide profiler of the server
+PROFILER = Profiler()
+
+
+def lap(stage):
+    """Lap the current frame's timer."""
+    PROFILER.current.lap(stage)
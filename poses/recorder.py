@@ -0,0 +1,249 @@
+"""Session recordings: every analyzed frame and its feedback, in a compact append-only log.
+
+Set POSE_RECORD_DIR to record. Each session writes three files named after its start time and
+sid:
+
+    <name>.rec      a 16-byte header, then one fixed-size RECORD per analyzed frame
+    <name>.strings  the UTF-8 pose names and feedback texts the records point into
+    <name>.json     the index: sid, wall-clock start, record and string byte counts
+
+A record holds the frame's time since the session started, its float32 (33, 4) landmarks as
+received (before smoothing), the result (accuracy, correctness mask, feedback text) and
+whether the feedback was emitted or came from the held-pose cache. The server fills records
+into a preallocated batch. A batch goes to one background thread when it is full, when a frame
+arrives POSE_RECORD_FLUSH seconds after its first one, or when the client disconnects; the
+thread appends it and then rewrites the index. The index only ever counts complete batches, so
+a crash loses at most the last batch and never leaves a torn record visible.
+
+SessionLog memory-maps a recording for random access and sequential replay:
+
+    python -m poses.recorder recordings/20240101-120000-<sid>.rec
+"""
+import atexit
+import json
+import math
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+
+import numpy as np
+
+from . import config
+from .asans.landmarks import NUM_LANDMARKS
+from .feedback import correct_mask
+from .log import SERVER
+
+MAGIC = b"POSEREC\0"
+VERSION = 1
+# magic, version, record size, 4 bytes reserved
+HEADER = struct.Struct("<8sHH4x")
+
+# Record flags
+FLAG_EMITTED = 1  # poseFeedback was sent for this frame
+FLAG_CACHED = 2  # The result came from the held-pose cache
+
+RECORD = np.dtype([
+    ("t", "<f8"),  # Seconds since the session started (monotonic clock)
+    ("flags", "u1"),
+    ("dropped", "<u2"),  # Frames replaced in the mailbox since the previous record
+    ("accuracy", "<f4"),  # NaN when the detector returned no result
+    ("mask", "<u8"),  # Correct landmarks, landmark i in bit i
+    ("pose", "<u4"), ("pose_len", "<u2"),  # Instruction text in the strings file
+    ("feedback", "<u4"), ("feedback_len", "<u4"),  # Feedback text in the strings file
+    ("landmarks", "<f4", (NUM_LANDMARKS, 4)),
+])
+
+SUFFIX = ".rec"
+
+
+class _Writer:
+    """Appends the batches of every recording from one background thread."""
+
+    def __init__(self):
+        self._batches = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._failed = set()
+
+    def submit(self, item):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="pose-recorder", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.stop)
+        self._batches.put(item)
+
+    def stop(self):
+        """Write everything submitted so far, then end the thread."""
+        if self._thread is not None:
+            self._batches.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while True:
+            item = self._batches.get()
+            if item is None:
+                return
+            stem, records, strings, index = item
+            if stem in self._failed:
+                continue  # Later batches would not line up with the index
+            try:
+                with open(stem + SUFFIX, "ab") as f:
+                    if f.tell() == 0:
+                        f.write(HEADER.pack(MAGIC, VERSION, RECORD.itemsize))
+                    f.write(records.tobytes())
+                with open(stem + ".strings", "ab") as f:
+                    f.write(strings)
+                # Replace the index only once the data it counts is written
+                with open(stem + ".json.tmp", "w") as f:
+                    json.dump(index, f)
+                os.replace(stem + ".json.tmp", stem + ".json")
+            except OSError as e:
+                self._failed.add(stem)
+                SERVER.error("Cannot write recording %s, stopped recording it: %s", stem, e)
+
+
+WRITER = _Writer()
+
+
+class SessionRecorder:
+    """Collects one session's records into batches for the background writer."""
+
+    def __init__(self, sid, directory=None, batch=None, flush_after=None):
+        directory = config.RECORD_DIR if directory is None else directory
+        os.makedirs(directory, exist_ok=True)
+        self.stem = os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{sid}")
+        self.flush_after = config.RECORD_FLUSH if flush_after is None else flush_after
+        self.index = {"version": VERSION, "sid": sid, "started": time.time(), "records": 0, "strings": 0}
+        self._batch = np.zeros(config.RECORD_BATCH if batch is None else batch, dtype=RECORD)
+        self._count = 0
+        self._strings = bytearray()
+        self._string_refs = {}  # Text -> (offset, length) for the pose names, which repeat
+        self._last_feedback = ("", (0, 0))
+        self._started = None
+        self._batch_started = None
+        self._dropped = 0
+
+    def _text(self, text):
+        data = text.encode()
+        ref = (self.index["strings"] + len(self._strings), len(data))
+        self._strings += data
+        return ref
+
+    def record(self, received_at, instructions, landmarks, result, emitted, cached, dropped_total):
+        """Add one analyzed frame; result is the detector's tuple, or None.
+
+        dropped_total is the session's count of frames dropped unanalyzed so far.
+        """
+        if self._started is None:
+            self._started = received_at
+            self._dropped = dropped_total
+        if self._count == 0:
+            self._batch_started = received_at
+        dropped = min(dropped_total - self._dropped, 0xFFFF)
+        self._dropped = dropped_total
+
+        pose = instructions if isinstance(instructions, str) else ""
+        pose_ref = self._string_refs.get(pose)
+        if pose_ref is None:
+            pose_ref = self._string_refs[pose] = self._text(pose)
+        if result is None:
+            accuracy, mask, feedback = math.nan, 0, ""
+        else:
+            accuracy, _, correct, feedback = result
+            mask = correct_mask(correct)
+        # Feedback mostly repeats between frames: store a text once per change
+        if feedback != self._last_feedback[0]:
+            self._last_feedback = (feedback, self._text(feedback))
+
+        # One assignment of the whole record; field by field costs several times more
+        flags = FLAG_EMITTED * bool(emitted) | FLAG_CACHED * bool(cached)
+        self._batch[self._count] = (received_at - self._started, flags, dropped, accuracy, mask,
+                                    *pose_ref, *self._last_feedback[1], landmarks)
+        self._count += 1
+        if self._count == len(self._batch) or received_at - self._batch_started >= self.flush_after:
+            self.flush()
+
+    def flush(self):
+        """Hand the current batch to the writer."""
+        if not self._count:
+            return
+        self.index["records"] += self._count
+        self.index["strings"] += len(self._strings)
+        # The writer owns the filled buffer from here on; every field of a new record gets set
+        records, self._batch = self._batch[:self._count], np.empty_like(self._batch)
+        WRITER.submit((self.stem, records, bytes(self._strings), dict(self.index)))
+        self._count = 0
+        self._strings = bytearray()
+
+
+class SessionLog:
+    """Read-only, memory-mapped view of a recording; pass the path of any of its files."""
+
+    def __init__(self, path):
+        self.stem = os.path.splitext(path)[0]
+        with open(self.stem + ".json") as f:
+            self.index = json.load(f)
+        with open(self.stem + SUFFIX, "rb") as f:
+            magic, version, record_size = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION or record_size != RECORD.itemsize:
+            raise ValueError(f"Not a version {VERSION} session recording: {self.stem + SUFFIX}")
+        count = self.index["records"]
+        self.records = (np.memmap(self.stem + SUFFIX, dtype=RECORD, mode="r", offset=HEADER.size, shape=(count,))
+                        if count else np.zeros(0, dtype=RECORD))
+        self._strings = (np.memmap(self.stem + ".strings", dtype=np.uint8, mode="r", shape=(self.index["strings"],))
+                         if self.index["strings"] else np.zeros(0, dtype=np.uint8))
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def landmarks(self):
+        """(N, 33, 4) float32 view of every frame's landmarks."""
+        return self.records["landmarks"]
+
+    @property
+    def times(self):
+        return self.records["t"]
+
+    def _text(self, offset, length):
+        return self._strings[offset:offset + length].tobytes().decode()
+
+    def pose(self, i):
+        record = self.records[i]
+        return self._text(record["pose"], record["pose_len"])
+
+    def feedback(self, i):
+        record = self.records[i]
+        return self._text(record["feedback"], record["feedback_len"])
+
+    def at(self, t):
+        """Index of the first frame at or after t seconds into the session."""
+        return int(np.searchsorted(self.times, t))
+
+    def frames(self, start=0, stop=None):
+        """Yield (t, pose, landmarks) in recorded order, e.g. to replay the session into a detector."""
+        pose_refs = {}
+        for record in self.records[start:stop]:
+            ref = (int(record["pose"]), int(record["pose_len"]))
+            pose = pose_refs.get(ref)
+            if pose is None:
+                pose = pose_refs[ref] = self._text(*ref)
+            yield float(record["t"]), pose, record["landmarks"]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("usage: python -m poses.recorder <recording>")
+    log = SessionLog(sys.argv[1])
+    records = log.records
+    poses = sorted({log.pose(i) for i in np.unique(records["pose"], return_index=True)[1]})
+    print(f"{log.index['sid']}: {len(log)} frames over {float(log.times[-1]) if len(log) else 0:.1f} s, "
+          f"{int((records['flags'] & FLAG_EMITTED).astype(bool).sum())} emitted, "
+          f"{int((records['flags'] & FLAG_CACHED).astype(bool).sum())} cached, "
+          f"{int(records['dropped'].sum())} dropped; poses: {', '.join(poses) or '-'}")
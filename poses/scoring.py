@@ -0,0 +1,237 @@
+"""Offline batch scoring of recorded landmark files, sharded over worker processes.
+
+    python -m poses.scoring recordings/ --out scores/
+    python -m poses.scoring class.ndjson --pose NAVASANA --pose VAJRASANA --workers 8
+
+Inputs are files or directories (searched recursively) of:
+    .rec            session recordings (see poses/recorder.py)
+    .npy / .npz     (N, 33, C) arrays; in an .npz, the `landmarks` array
+    .json           a list of frames, or an object whose `frames` member is one
+    .ndjson/.jsonl  one frame per line
+A JSON frame is one person's landmark list, as in poseData's pose_landmarks[0], or a whole
+poseData payload.
+
+Every requested pose (all registered ones by default) scores every frame through
+PoseDetection.analyze_batch. Recordings and .npy files are memory-mapped and split into chunks
+of --chunk frames, so one long file still spreads over all workers; other files are one task
+each. For each input the tool writes <name>.scores.npz next to it or, with --out, under the
+same relative directory as below the directory argument it was found in, with one column per
+pose:
+
+    poses     (P,) pose names
+    accuracy  (N, P) float32, percentage of correct landmarks; NaN for frames without a person
+    mask      (N, P) int64, correct landmarks, landmark i in bit i
+    codes     (N, P) int64, failed checks, check i in bit i; -1 for poses without check codes
+              and for frames without a person
+    checks    (P, K) the label of each code bit per pose, '' past a pose's last check
+    t         (N,) seconds into the session, for recordings only
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from . import recorder, workers
+from .asans.batch import bitmask, check_frames
+from .asans.landmarks import NUM_LANDMARKS, landmarks_to_array
+from .pose_detection import PoseDetection
+
+JSON_SUFFIXES = (".json", ".ndjson", ".jsonl")
+MAPPED_SUFFIXES = (recorder.SUFFIX, ".npy")
+SUFFIXES = JSON_SUFFIXES + MAPPED_SUFFIXES + (".npz",)
+
+def _frame_array(frame):
+    if isinstance(frame, dict):
+        frame = frame["pose_landmarks"][0]
+    return landmarks_to_array(frame)
+
+
+def load_landmarks(path):
+    """(N, 33, C) landmarks of an input file; memory-mapped for recordings and .npy files."""
+    if path.endswith(recorder.SUFFIX):
+        return recorder.SessionLog(path).landmarks
+    if path.endswith(".npy"):
+        return check_frames(np.load(path, mmap_mode="r"))
+    if path.endswith(".npz"):
+        with np.load(path) as data:
+            frames = check_frames(data["landmarks"])
+            if "present" in data.files:
+                # Frames without a person, as poses.video writes them: never scored (see analyze_batch)
+                frames = np.where(data["present"][:, None, None], frames, np.nan).astype(frames.dtype, copy=False)
+        return frames
+    with open(path) as f:
+        if path.endswith(".json"):
+            frames = json.load(f)
+            if isinstance(frames, dict):
+                frames = frames["frames"]
+        else:
+            frames = [json.loads(line) for line in f if line.strip()]
+    if not frames:
+        return np.zeros((0, NUM_LANDMARKS, 4), dtype=np.float32)
+    return np.stack([_frame_array(frame) for frame in frames])
+
+
+def _score(path, start, stop, poses):
+    """Score frames [start, stop) of one file against poses, in a worker."""
+    frames = np.ascontiguousarray(load_landmarks(path)[start:stop])
+    columns = []
+    for pose in poses:
+        result = workers._detector.analyze_batch(pose, frames)
+        columns.append((result.accuracy, bitmask(result.correct), result.codes, result.checks))
+    return path, start, len(frames), columns
+
+
+class FileScores:
+    """Collects the chunks of one input file into its output columns."""
+
+    def __init__(self, path, poses, chunks, frames=None):
+        self.path = path
+        self.poses = poses
+        self.pending = chunks
+        self.frames = frames
+        self.accuracy = self.mask = self.codes = None
+        self.checks = [()] * len(poses)
+
+    def add(self, start, count, columns):
+        if self.accuracy is None:
+            # A file parsed in the worker is one chunk: its first chunk tells its length
+            frames = start + count if self.frames is None else self.frames
+            self.accuracy = np.zeros((frames, len(self.poses)), dtype=np.float32)
+            self.mask = np.zeros((frames, len(self.poses)), dtype=np.int64)
+            self.codes = np.zeros((frames, len(self.poses)), dtype=np.int64)
+        rows = slice(start, start + count)
+        for j, (accuracy, mask, codes, checks) in enumerate(columns):
+            self.accuracy[rows, j] = accuracy
+            self.mask[rows, j] = mask
+            self.codes[rows, j] = codes
+            self.checks[j] = checks
+        self.pending -= 1
+
+    def save(self, out_path, compress):
+        width = max((len(checks) for checks in self.checks), default=0)
+        checks = np.array([list(checks) + [""] * (width - len(checks)) for checks in self.checks], dtype=str)
+        columns = dict(poses=np.array(self.poses), accuracy=self.accuracy, mask=self.mask, codes=self.codes,
+                       checks=checks.reshape(len(self.poses), width))
+        if self.path.endswith(recorder.SUFFIX):
+            columns["t"] = np.asarray(recorder.SessionLog(self.path).times)
+        # Written under a temporary name, so an interrupted run never leaves a partial output
+        tmp_path = out_path + ".tmp.npz"
+        (np.savez_compressed if compress else np.savez)(tmp_path, **columns)
+        os.replace(tmp_path, out_path)
+
+
+def find_inputs(paths):
+    """(file, its directory relative to the argument it was found in) for the inputs in paths.
+
+    Directories are searched recursively, in a stable order; a file argument's directory is ''.
+    """
+    inputs = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                for name in sorted(names):
+                    stem, suffix = os.path.splitext(name)
+                    # Skip earlier outputs and the index files next to recordings
+                    if name.endswith(SUFFIXES) and not name.endswith(".scores.npz") and not (
+                            suffix == ".json" and stem + recorder.SUFFIX in names):
+                        relative = os.path.relpath(root, path)
+                        inputs.append((os.path.join(root, name), "" if relative == os.curdir else relative))
+        else:
+            inputs.append((path, ""))
+    return inputs
+
+
+def output_path(path, out_dir, relative=""):
+    """<name>.scores.npz next to the input, or under out_dir in the input's relative directory."""
+    name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(os.path.join(out_dir, relative) if out_dir else os.path.dirname(path), f"{name}.scores.npz")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score recorded landmark files against the registered poses.")
+    parser.add_argument("inputs", nargs="+", help="files or directories of .rec, .npy, .npz, .json or .ndjson")
+    parser.add_argument("--pose", action="append", help="score only this pose (repeatable; default all)")
+    parser.add_argument("--out", help="output directory (default: next to each input)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes (default: cores)")
+    parser.add_argument("--chunk", type=int, default=20000, help="frames per task of a memory-mapped file")
+    parser.add_argument("--compress", action="store_true", help="write compressed .npz files")
+    parser.add_argument("--skip-existing", action="store_true", help="skip inputs whose output already exists")
+    args = parser.parse_args()
+
+    registered = tuple(PoseDetection().pose_modules)
+    poses = [pose.upper() for pose in args.pose] if args.pose else list(registered)
+    unknown = sorted(set(poses) - set(registered))
+    if unknown:
+        sys.exit(f"Unknown pose(s): {', '.join(unknown)}")
+
+    outputs = {}
+    for path, relative in find_inputs(args.inputs):
+        outputs.setdefault(output_path(path, args.out, relative), []).append(path)
+    collisions = {out_path: paths for out_path, paths in outputs.items() if len(paths) > 1}
+    if collisions:
+        sys.exit("Inputs with the same output:\n" + "\n".join(
+            f"  {out_path}: {', '.join(paths)}" for out_path, paths in sorted(collisions.items())))
+    outputs = {paths[0]: out_path for out_path, paths in outputs.items()}
+    for out_path in set(outputs.values()):
+        os.makedirs(os.path.dirname(out_path) or os.curdir, exist_ok=True)
+
+    inputs = [path for path, out_path in outputs.items() if not (args.skip_existing and os.path.exists(out_path))]
+    started = time.perf_counter()
+    total_frames = 0
+    failed = set()
+    # Spawn, as for the server's workers: each worker builds its own detector once
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=workers._init_worker) as executor:
+        files, futures = {}, {}
+        for path in inputs:
+            if path.endswith(MAPPED_SUFFIXES):
+                try:
+                    frames = len(load_landmarks(path))
+                except (OSError, ValueError) as e:
+                    print(f"{path}: skipped, {e}", file=sys.stderr)
+                    failed.add(path)
+                    continue
+                chunks = [(start, min(start + args.chunk, frames)) for start in range(0, frames, args.chunk)]
+                chunks = chunks or [(0, 0)]
+            else:
+                frames, chunks = None, [(0, None)]  # Parsed once, in the worker
+            files[path] = FileScores(path, poses, len(chunks), frames)
+            for start, stop in chunks:
+                futures[executor.submit(_score, path, start, stop, poses)] = path
+
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                _, start, count, columns = future.result()
+            except Exception as e:
+                if path not in failed:
+                    print(f"{path}: failed, {e!r}", file=sys.stderr)
+                failed.add(path)
+                files.pop(path, None)  # Its other chunks are dropped too
+                continue
+            scores = files.get(path)
+            if scores is None:
+                continue
+            scores.add(start, count, columns)
+            if scores.pending == 0:
+                out_path = outputs[path]
+                scores.save(out_path, args.compress)
+                total_frames += len(scores.accuracy)
+                print(f"{path}: {len(scores.accuracy)} frames -> {out_path}")
+
+    elapsed = time.perf_counter() - started
+    print(f"Scored {total_frames} frames x {len(poses)} poses in {elapsed:.1f} s "
+          f"({total_frames * len(poses) / max(elapsed, 1e-9):.0f} pose-frames/s)")
+    # A scheduled re-scoring run must not report success with outputs missing
+    if failed:
+        sys.exit(f"{len(failed)} input(s) failed or were skipped")
+
+
+if __name__ == "__main__":
+    main()
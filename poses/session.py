@@ -0,0 +1,26 @@
+from . import config
+from .feedback import FeedbackEmitter
+from .frame_cache import FrameCache
+from .mailbox import Mailbox
+from .metrics import FrameRate
+from .orientation import OrientationTracker
+from .recorder import SessionRecorder
+from .smoothing import OneEuroFilter
+from .wire import FrameDecoder
+
+
+class Session:
+    """Per-client state kept between poseData frames, keyed by Socket.IO sid."""
+
+    def __init__(self, sid=None):
+        self.orientation = OrientationTracker()
+        self.smoother = OneEuroFilter() if config.SMOOTHING else None
+        self.cache = FrameCache()
+        self.mailbox = Mailbox()
+        self.frame_rate = FrameRate()
+        self.decoder = FrameDecoder()
+        self.feedback = FeedbackEmitter()
+        self.recorder = SessionRecorder(sid) if config.RECORD_DIR else None
+        # Set by the server: wakes the session's analysis task when a frame arrives
+        self.wakeup = None
+        self.closed = False
@@ -0,0 +1,74 @@
+import math
+import time
+
+import numpy as np
+
+from . import config
+from .asans.landmarks import LANDMARK_FIELDS, NUM_LANDMARKS, VISIBILITY
+
+# Smoothed columns: x, y and z; visibility passes through
+_SMOOTHED = 3
+
+
+def _alpha(cutoff, dt):
+    """Smoothing factor of a first-order low-pass filter at `cutoff` Hz sampled every dt seconds."""
+    r = 2 * math.pi * cutoff * dt
+    return r / (r + 1)
+
+
+class OneEuroFilter:
+    """One Euro filter over a (33, 4) landmark array, with O(1) preallocated state per landmark.
+
+    The cutoff frequency rises with each landmark's speed: a held pose is smoothed strongly
+    while fast movements keep little lag. The returned array is reused by the next call.
+    """
+
+    def __init__(self, min_cutoff=None, beta=None, d_cutoff=None, reset_after=None):
+        self.min_cutoff = config.SMOOTHING_MIN_CUTOFF if min_cutoff is None else min_cutoff
+        self.beta = config.SMOOTHING_BETA if beta is None else beta
+        self.d_cutoff = config.SMOOTHING_D_CUTOFF if d_cutoff is None else d_cutoff
+        self.reset_after = config.SMOOTHING_RESET_AFTER if reset_after is None else reset_after
+
+        self._value = np.zeros((NUM_LANDMARKS, _SMOOTHED), dtype=np.float32)
+        self._speed = np.zeros((NUM_LANDMARKS, _SMOOTHED), dtype=np.float32)
+        self._alpha = np.zeros((NUM_LANDMARKS, _SMOOTHED), dtype=np.float32)
+        self._step = np.zeros((NUM_LANDMARKS, _SMOOTHED), dtype=np.float32)
+        self._out = np.zeros((NUM_LANDMARKS, len(LANDMARK_FIELDS)), dtype=np.float32)
+        self._t = None
+
+    def reset(self):
+        self._t = None
+
+    def __call__(self, landmarks, t=None):
+        """Smooth one (33, 4) frame taken at time t (seconds, monotonic clock by default)."""
+        t = time.monotonic() if t is None else t
+        raw = landmarks[:, :_SMOOTHED]
+
+        if self._t is None or not 0 < t - self._t <= self.reset_after:
+            self._value[:] = raw
+            self._speed[:] = 0
+        else:
+            dt = t - self._t
+            # Speed estimate, low-passed at the fixed derivative cutoff
+            np.subtract(raw, self._value, out=self._step)
+            self._step /= dt
+            self._step -= self._speed
+            self._step *= _alpha(self.d_cutoff, dt)
+            self._speed += self._step
+
+            # Per-landmark alpha from the speed-dependent cutoff: r / (r + 1), r = 2π·fc·dt
+            np.abs(self._speed, out=self._alpha)
+            self._alpha *= self.beta
+            self._alpha += self.min_cutoff
+            self._alpha *= 2 * math.pi * dt
+            np.add(self._alpha, 1, out=self._step)
+            self._alpha /= self._step
+
+            np.subtract(raw, self._value, out=self._step)
+            self._step *= self._alpha
+            self._value += self._step
+        self._t = t
+
+        self._out[:, :_SMOOTHED] = self._value
+        self._out[:, VISIBILITY] = landmarks[:, VISIBILITY]
+        return self._out
@@ -0,0 +1,291 @@
+"""Server-side landmarking of video files with OpenCV and MediaPipe Pose, on every core.
+
+    python -m poses.video class.mp4 --out class.npz
+    python -m poses.video class.mp4 --pose NAVASANA --workers 4
+
+A reader thread decodes the video with OpenCV into chunks of consecutive frames and puts them
+on a bounded queue. Worker threads, each with its own MediaPipe Pose, landmark whole chunks:
+MediaPipe releases the GIL while its graph runs, so threads use all cores without copying
+frames between processes, and a chunk of consecutive frames keeps MediaPipe's tracking and
+landmark smoothing working within it. stream_landmarks() yields the frames in video order.
+
+Decoded images stay bounded whatever the video's length: the reader only reads a chunk once a
+slot is free, and a slot is freed when the chunk's last frame has been yielded, so at most
+`queued + 2 * workers` chunks are alive at once. Frames are downscaled to --max-side pixels
+before they are queued, the resolution of the browser's webcam stream. Only landmarks are kept
+for the whole video, for the cache or --out, as LandmarkArrays of 540 bytes a frame. With a
+LandmarkCache (see poses/landmark_cache.py) a video landmarked before skips all of this.
+"""
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+from collections import namedtuple
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from .asans.landmarks import NUM_LANDMARKS
+from .landmark_cache import MAX_BYTES, LandmarkCache, dequantize, quantize
+from .orientation import OrientationTracker
+from .pose_detection import AUTO_POSE, PoseDetection
+
+# landmarks is a float32 (33, 4) array of x, y, z, visibility, or None when nobody was found
+VideoFrame = namedtuple("VideoFrame", ["index", "time", "landmarks"])
+
+# Seconds between checks whether the consumer closed the stream, while a thread waits
+POLL_INTERVAL = 0.1
+
+
+class LandmarkArrays:
+    """The frames of a stream as compact arrays, grown by doubling: 540 bytes a frame.
+
+    landmarks is (N, 33, 4) float32, NaN for frames without a person, as --out writes it.
+    """
+
+    def __init__(self, capacity=1024):
+        self._index = np.empty(capacity, dtype=np.int64)
+        self._time = np.empty(capacity, dtype=np.float64)
+        self._landmarks = np.empty((capacity, NUM_LANDMARKS, 4), dtype=np.float32)
+        self.count = 0
+
+    def append(self, frame):
+        if self.count == len(self._index):
+            capacity = 2 * self.count
+            self._index = np.resize(self._index, capacity)
+            self._time = np.resize(self._time, capacity)
+            self._landmarks = np.resize(self._landmarks, (capacity, NUM_LANDMARKS, 4))
+        self._index[self.count] = frame.index
+        self._time[self.count] = frame.time
+        self._landmarks[self.count] = np.nan if frame.landmarks is None else frame.landmarks
+        self.count += 1
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def index(self):
+        return self._index[:self.count]
+
+    @property
+    def time(self):
+        return self._time[:self.count]
+
+    @property
+    def landmarks(self):
+        return self._landmarks[:self.count]
+
+    @property
+    def present(self):
+        return ~np.isnan(self._landmarks[:self.count, 0, 0])
+
+
+def _put(items, item, stop):
+    """Put onto a bounded queue unless the stream stopped meanwhile; returns whether it was put."""
+    while not stop.is_set():
+        try:
+            items.put(item, timeout=POLL_INTERVAL)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _landmark_array(result):
+    if result.pose_landmarks is None:
+        return None
+    return np.array([(p.x, p.y, p.z, p.visibility) for p in result.pose_landmarks.landmark], dtype=np.float32)
+
+
+def _read(capture, fps, chunk, stride, max_side, tasks, results, slots, stop, workers):
+    """Reader thread: decode frames into chunks of consecutive frames and queue them."""
+    seq = index = 0
+    try:
+        while not stop.is_set():
+            if not slots.acquire(timeout=POLL_INTERVAL):
+                continue
+            frames = []
+            while len(frames) < chunk and capture.grab():
+                if index % stride == 0:
+                    ok, image = capture.retrieve()
+                    if not ok:
+                        break
+                    height, width = image.shape[:2]
+                    scale = max_side / max(height, width) if max_side else 1
+                    if scale < 1:
+                        image = cv2.resize(image, (round(width * scale), round(height * scale)),
+                                           interpolation=cv2.INTER_AREA)
+                    frames.append((index, index / fps, cv2.cvtColor(image, cv2.COLOR_BGR2RGB)))
+                index += 1
+            if not frames or not _put(tasks, (seq, frames), stop):
+                break
+            seq += 1
+        results.put((None, seq))
+    except Exception as e:
+        results.put((None, e))
+    finally:
+        capture.release()
+        for _ in range(workers):
+            _put(tasks, None, stop)
+
+
+def _landmark(tasks, results, stop, model_complexity):
+    """Worker thread: landmark whole chunks with this thread's own MediaPipe Pose."""
+    pose = mp.solutions.pose.Pose(model_complexity=model_complexity)
+    last_seq = None
+    try:
+        while not stop.is_set():
+            try:
+                task = tasks.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            if task is None:
+                return
+            seq, frames = task
+            try:
+                if last_seq is not None and seq != last_seq + 1:
+                    pose.reset()  # Tracking must not carry over from a chunk earlier in the video
+                last_seq = seq
+                results.put((seq, [VideoFrame(index, t, _landmark_array(pose.process(image)))
+                                   for index, t, image in frames]))
+            except Exception as e:
+                results.put((seq, e))
+    finally:
+        pose.close()
+
+
+def stream_landmarks(path, workers=None, chunk=60, queued=None, stride=1, max_side=640, model_complexity=1,
+                     cache=None):
+    """Yield a VideoFrame for every stride-th frame of a video file, in order.
+
+    workers defaults to the number of cores and queued, the chunks waiting for a worker, to
+    workers. max_side=0 keeps the full resolution. Closing the generator early stops the
+    threads. With a LandmarkCache, a video landmarked before with the same model and frame
+    size is read from the cache, and a fully read video is stored in it. The cache stores
+    landmarks rounded to 1/4096 (x, y, z) and 1/255 (visibility); with a cache the frames are
+    rounded on a miss too, so results do not depend on whether the video was cached before.
+    """
+    if cache is None:
+        yield from _extract(path, workers, chunk, queued, stride, max_side, model_complexity)
+        return
+    digest = cache.content_hash(path)
+    variant = f"mp{mp.__version__}-model{model_complexity}-side{max_side}"
+    cached = cache.load(digest, variant, stride)
+    if cached is not None:
+        for index, t, landmarks in zip(*cached):
+            yield VideoFrame(int(index), float(t), landmarks)
+        return
+    frames = LandmarkArrays()
+    for frame in _extract(path, workers, chunk, queued, stride, max_side, model_complexity):
+        if frame.landmarks is not None:
+            frame = frame._replace(landmarks=dequantize(*quantize(frame.landmarks)))  # As a hit returns them
+        frames.append(frame)
+        yield frame
+    cache.store(digest, variant, stride, frames.index, frames.time, frames.landmarks)
+
+
+def _extract(path, workers, chunk, queued, stride, max_side, model_complexity):
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise ValueError(f"Cannot open video: {path}")
+    fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+    workers = workers or os.cpu_count()
+    queued = workers if queued is None else queued
+
+    tasks = queue.Queue(maxsize=queued)
+    results = queue.SimpleQueue()
+    slots = threading.Semaphore(queued + 2 * workers)
+    stop = threading.Event()
+    threads = [threading.Thread(target=_read, name="video-reader", daemon=True,
+                                args=(capture, fps, chunk, stride, max_side, tasks, results, slots, stop, workers))]
+    threads += [threading.Thread(target=_landmark, name=f"video-landmarks-{i}", daemon=True,
+                                 args=(tasks, results, stop, model_complexity)) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+
+    # Chunks finish out of order; hold them until the ones before them are yielded
+    done = {}
+    next_seq, total = 0, None
+    try:
+        while total is None or next_seq < total:
+            if next_seq in done:
+                yield from done.pop(next_seq)
+                slots.release()
+                next_seq += 1
+                continue
+            seq, item = results.get()
+            if isinstance(item, Exception):
+                raise item
+            if seq is None:
+                total = item
+            else:
+                done[seq] = item
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+
+def analyze_video(path, instructions, pose_detector=None, **options):
+    """Yield (VideoFrame, result) for a video, result being analyze_pose's tuple or None without a person.
+
+    The orientation is tracked over the whole video, as the server tracks it per session.
+    options go to stream_landmarks.
+    """
+    pose_detector = pose_detector or PoseDetection()
+    tracker = OrientationTracker()
+    for frame in stream_landmarks(path, **options):
+        if frame.landmarks is None:
+            yield frame, None
+        else:
+            yield frame, pose_detector.analyze_pose(instructions, frame.landmarks, tracker.update(frame.landmarks))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract pose landmarks from a video file, optionally scoring poses.")
+    parser.add_argument("video")
+    parser.add_argument("--out", help="write landmarks (NaN without a person), t, index and present to this .npz")
+    parser.add_argument("--pose", action="append", help="report the mean accuracy of this pose (repeatable)")
+    parser.add_argument("--workers", type=int, help="landmarking threads (default: cores)")
+    parser.add_argument("--chunk", type=int, default=60, help="consecutive frames per task (default 60)")
+    parser.add_argument("--stride", type=int, default=1, help="landmark every n-th frame")
+    parser.add_argument("--max-side", type=int, default=640, help="downscale frames to this size; 0 keeps them")
+    parser.add_argument("--model", type=int, choices=(0, 1, 2), default=1, help="MediaPipe model complexity")
+    parser.add_argument("--cache", help="landmark cache directory; a video landmarked before skips MediaPipe. "
+                        "Cached landmarks are rounded to 1/4096 of the frame (1/255 for visibility)")
+    parser.add_argument("--cache-size", type=int, default=MAX_BYTES >> 20, help="cache size bound in MB (default 2048)")
+    args = parser.parse_args()
+
+    pose_detector = PoseDetection()
+    poses = [pose.upper() for pose in args.pose or ()]
+    unknown = sorted(set(poses) - set(pose_detector.pose_functions) - {AUTO_POSE})
+    if unknown:
+        sys.exit(f"Unknown pose(s): {', '.join(unknown)}")
+    tracker = OrientationTracker()
+    # Compact arrays rather than the VideoFrames, for --out; the accuracies are a float a frame
+    frames, accuracy = LandmarkArrays(), {pose: [] for pose in poses}
+    started = time.perf_counter()
+    cache = LandmarkCache(args.cache, args.cache_size << 20) if args.cache else None
+    for frame in stream_landmarks(args.video, args.workers, args.chunk, stride=args.stride,
+                                  max_side=args.max_side, model_complexity=args.model, cache=cache):
+        frames.append(frame)
+        if frame.landmarks is not None and poses:
+            orientation = tracker.update(frame.landmarks)
+            for pose in poses:
+                accuracy[pose].append(pose_detector.analyze_pose(pose, frame.landmarks, orientation)[0])
+    elapsed = time.perf_counter() - started
+
+    present = frames.present
+    print(f"{len(frames)} frames in {elapsed:.1f} s ({len(frames) / max(elapsed, 1e-9):.1f} fps), "
+          f"a person in {int(present.sum())}", file=sys.stderr)
+    for pose, values in accuracy.items():
+        print(f"{pose}: mean accuracy {np.mean(values) if values else 0:.1f}% over {len(values)} frames")
+    if args.out:
+        np.savez(args.out, landmarks=frames.landmarks, present=present, t=frames.time, index=frames.index)
+
+
+if __name__ == "__main__":
+    main()
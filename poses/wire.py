@@ -0,0 +1,166 @@
+"""Binary landmark frames sent by the client as Socket.IO binary attachments.
+
+Layout (little-endian), version 1:
+
+    offset  size  field
+    0       1     protocol version
+    1       1     flags (reserved, 0)
+    2       2     pose id, an index into the catalog sent on connect (NO_POSE if unset)
+    4       2     person count
+    6       2     landmark count per person (33)
+    8       8     frame timestamp in milliseconds (float64, client clock)
+    16      ...   person count x landmark count x (x, y, z, visibility) float32
+"""
+import struct
+from collections import namedtuple
+
+import numpy as np
+
+from .asans.landmarks import LANDMARK_FIELDS, NUM_LANDMARKS
+
+VERSION = 1
+HEADER = struct.Struct("<BBHHHd")
+NO_POSE = 0xFFFF
+
+# A decoded frame; landmarks is a read-only (persons, 33, 4) float32 view of the payload
+WireFrame = namedtuple("WireFrame", ["version", "flags", "pose_id", "timestamp", "landmarks"])
+
+
+def decode_frame(payload):
+    """Decode a binary frame without copying its landmark data; raises ValueError when malformed."""
+    if len(payload) < HEADER.size:
+        raise ValueError(f"Frame too short: {len(payload)} bytes")
+    version, flags, pose_id, persons, count, timestamp = HEADER.unpack_from(payload)
+    if version != VERSION:
+        raise ValueError(f"Unsupported frame version {version}")
+    if persons and count != NUM_LANDMARKS:
+        raise ValueError(f"Expected {NUM_LANDMARKS} landmarks per person, got {count}")
+    size = HEADER.size + persons * count * len(LANDMARK_FIELDS) * 4
+    if len(payload) != size:
+        raise ValueError(f"Frame of {persons} person(s) should be {size} bytes, got {len(payload)}")
+    landmarks = np.frombuffer(payload, dtype='<f4', offset=HEADER.size)
+    return WireFrame(version, flags, pose_id, timestamp, landmarks.reshape(persons, count, len(LANDMARK_FIELDS)))
+
+
+def encode_frame(landmarks, pose_id=NO_POSE, timestamp=0.0, flags=0):
+    """Encode a (persons, 33, 4) or (33, 4) landmark array as a binary frame."""
+    landmarks = np.asarray(landmarks, dtype='<f4')
+    if landmarks.ndim == 2:
+        landmarks = landmarks[np.newaxis]
+    persons, count, _ = landmarks.shape
+    return HEADER.pack(VERSION, flags, pose_id, persons, count, timestamp) + landmarks.tobytes()
+
+
+# Version 2: quantized frames for low-bandwidth clients. After the common header:
+#
+#     offset  size  field
+#     16      2     keyframe id (u16, wraps)
+#     18      1     bytes per coordinate delta (1 or 2; 0 in keyframes)
+#     19      1     reserved
+#     20      ...   keyframe: person x landmark x (x, y, z) int16, coordinate * COORD_SCALE
+#                   delta:    person x landmark x (x, y, z) int8/int16 difference to the keyframe
+#     ...     ...   person x landmark visibility uint8, visibility * 255
+#
+# Deltas are taken against the keyframe, not the previous frame, so errors never accumulate
+# and any delta frame decodes on its own once its keyframe is known.
+VERSION_QUANTIZED = 2
+FLAG_KEYFRAME = 0x01
+COORD_SCALE = 4096
+QUANT_HEADER = struct.Struct("<HBx")
+_COORDS = 3
+_DELTA_TYPES = {1: np.dtype('i1'), 2: np.dtype('<i2')}
+
+
+class KeyframeRequired(ValueError):
+    """A delta frame arrived whose keyframe the decoder does not hold."""
+
+
+class FrameDecoder:
+    """Per-session decoder of binary frames; holds the last keyframe of quantized streams."""
+
+    def __init__(self):
+        self.keyframe_id = None
+        self._keyframe = None
+
+    def decode(self, payload):
+        """Decode a version 1 or 2 frame into a WireFrame with float32 (persons, 33, 4) landmarks."""
+        if len(payload) < HEADER.size:
+            raise ValueError(f"Frame too short: {len(payload)} bytes")
+        if payload[0] != VERSION_QUANTIZED:
+            return decode_frame(payload)
+
+        _, flags, pose_id, persons, count, timestamp = HEADER.unpack_from(payload)
+        if persons and count != NUM_LANDMARKS:
+            raise ValueError(f"Expected {NUM_LANDMARKS} landmarks per person, got {count}")
+        if len(payload) < HEADER.size + QUANT_HEADER.size:
+            raise ValueError(f"Frame too short: {len(payload)} bytes")
+        keyframe_id, width = QUANT_HEADER.unpack_from(payload, HEADER.size)
+        keyframe = flags & FLAG_KEYFRAME
+        coord_type = np.dtype('<i2') if keyframe else _DELTA_TYPES.get(width)
+        if coord_type is None:
+            raise ValueError(f"Unsupported delta width {width}")
+
+        n = persons * count
+        offset = HEADER.size + QUANT_HEADER.size
+        size = offset + n * _COORDS * coord_type.itemsize + n
+        if len(payload) != size:
+            raise ValueError(f"Frame of {persons} person(s) should be {size} bytes, got {len(payload)}")
+        coords = np.frombuffer(payload, dtype=coord_type, count=n * _COORDS, offset=offset).reshape(persons, count, _COORDS)
+        visibility = np.frombuffer(payload, dtype=np.uint8, count=n, offset=offset + coords.nbytes).reshape(persons, count)
+
+        if keyframe:
+            self.keyframe_id = keyframe_id
+            self._keyframe = coords.astype(np.int32)
+            quantized = self._keyframe
+        elif keyframe_id != self.keyframe_id or self._keyframe.shape != coords.shape:
+            raise KeyframeRequired(f"Missing keyframe {keyframe_id}")
+        else:
+            quantized = self._keyframe + coords
+
+        landmarks = np.empty((persons, count, len(LANDMARK_FIELDS)), dtype=np.float32)
+        np.multiply(quantized, 1.0 / COORD_SCALE, out=landmarks[..., :_COORDS], casting='unsafe')
+        np.multiply(visibility, 1.0 / 255, out=landmarks[..., _COORDS], casting='unsafe')
+        return WireFrame(VERSION_QUANTIZED, flags, pose_id, timestamp, landmarks)
+
+
+class QuantizedEncoder:
+    """Encoder of version 2 frames.
+
+    Sends int8 deltas while every coordinate stays within 127 steps of the keyframe, and a new
+    keyframe otherwise (an int16 delta would be as large) or every keyframe_interval frames.
+    """
+
+    def __init__(self, keyframe_interval=30):
+        self.keyframe_interval = keyframe_interval
+        self.keyframe_id = 0
+        self._keyframe = None
+        self._since_keyframe = 0
+
+    def request_keyframe(self):
+        self._keyframe = None
+
+    def encode(self, landmarks, pose_id=NO_POSE, timestamp=0.0):
+        """Encode a (persons, 33, 4) or (33, 4) float landmark array."""
+        landmarks = np.asarray(landmarks, dtype=np.float32)
+        if landmarks.ndim == 2:
+            landmarks = landmarks[np.newaxis]
+        persons, count, _ = landmarks.shape
+        quantized = np.clip(np.rint(landmarks[..., :_COORDS] * COORD_SCALE), -32767, 32767).astype(np.int32)
+        visibility = np.clip(np.rint(landmarks[..., _COORDS] * 255), 0, 255).astype(np.uint8)
+
+        delta = None
+        if self._keyframe is not None and self._keyframe.shape == quantized.shape and self._since_keyframe < self.keyframe_interval:
+            delta = quantized - self._keyframe
+            if delta.size and np.abs(delta).max() > 127:
+                delta = None
+
+        if delta is None:
+            self.keyframe_id = (self.keyframe_id + 1) & 0xFFFF
+            self._keyframe = quantized
+            self._since_keyframe = 0
+            flags, width, body = FLAG_KEYFRAME, 0, quantized.astype('<i2')
+        else:
+            self._since_keyframe += 1
+            flags, width, body = 0, 1, delta.astype(_DELTA_TYPES[1])
+        return (HEADER.pack(VERSION_QUANTIZED, flags, pose_id, persons, count, timestamp)
+                + QUANT_HEADER.pack(self.keyframe_id, width) + body.tobytes() + visibility.tobytes())
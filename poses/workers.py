@@ -0,0 +1,56 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# The worker process's own detector, created once by _init_worker
+_detector = None
+
+
+def _init_worker():
+    global _detector
+    from . import log
+    from .pose_detection import PoseDetection
+    log.configure()
+    _detector = PoseDetection()
+
+
+def _ready():
+    pass
+
+
+def _analyze(instructions, landmarks, orientation):
+    return _detector.analyze_pose(instructions, landmarks, orientation)
+
+
+class AnalysisPool:
+    """Worker processes running PoseDetection.analyze_pose off the eventlet hub.
+
+    analyze() blocks only the calling green thread: the wait for the worker happens on an
+    eventlet tpool OS thread, so the hub keeps serving every other client meanwhile.
+    """
+
+    def __init__(self, workers):
+        # Spawn rather than fork: forking a process whose hub and tpool threads are running is unsafe
+        self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                            initializer=_init_worker)
+        self.workers = workers
+        # Imported here: poses.scoring shares this module's worker initializer and runs without eventlet
+        from eventlet import tpool
+        self._execute = tpool.execute
+
+    def prewarm(self):
+        """Start every worker and wait until each has built its detector, so no session waits for it.
+
+        The executor starts a process per submitted task while none is idle, so one no-op per
+        worker, submitted at once, starts them all; a task only runs after its worker's initializer.
+        """
+        futures = [self.executor.submit(_ready) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+
+    def analyze(self, instructions, landmarks, orientation=None):
+        """Same result as PoseDetection.analyze_pose, computed in a worker process."""
+        future = self.executor.submit(_analyze, instructions, landmarks, orientation)
+        return self._execute(future.result)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
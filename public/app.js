@@ -1,8 +1,28 @@
 import PoseDetection from './poseDetection.js';
+import { encodePoseFrame, QuantizedEncoder } from './wire.js';
 
 // Connect to the WebSocket server
 const socket = io('/'); // Make sure to match your server address
 
+// Pose ids for binary frames, sent by the server on connect; JSON is used until it arrives
+let poseIds = null;
+socket.on('poseCatalog', (catalog) => {
+    poseIds = new Map(catalog.poses.map((name, id) => [name, id]));
+});
+
+// Quantized delta frames for slow links: forced with ?encoding=quantized (or ?encoding=float),
+// otherwise chosen when the browser reports a slow connection or data saver
+function useQuantizedFrames() {
+    const encoding = new URLSearchParams(window.location.search).get('encoding');
+    if (encoding) {
+        return encoding === 'quantized';
+    }
+    const connection = navigator.connection;
+    return Boolean(connection && (connection.saveData || ['slow-2g', '2g', '3g'].includes(connection.effectiveType)));
+}
+const quantizedEncoder = useQuantizedFrames() ? new QuantizedEncoder() : null;
+socket.on('poseKeyframe', () => { if (quantizedEncoder) quantizedEncoder.requestKeyframe(); });
+
 // Function to start the webcam
 async function setupWebcam() {
     const video = document.querySelector('.local-video');
@@ -27,8 +47,16 @@ async function startPoseDetection() {
         const instructions = document.getElementById('asana-select').value;
         poseResult = result; // Store the latest pose result
         if (poseResult) {
-            // Emit the latest pose data to the WebSocket server
-            socket.emit('poseData', { pose_landmarks: poseResult.landmarks, instructions });
+            // Emit the latest pose data to the WebSocket server, as a binary frame when possible
+            const poseId = poseIds ? poseIds.get(instructions.toUpperCase()) : undefined;
+            if (poseId !== undefined) {
+                const frame = quantizedEncoder
+                    ? quantizedEncoder.encode(poseResult.landmarks, poseId, performance.now())
+                    : encodePoseFrame(poseResult.landmarks, poseId, performance.now());
+                socket.emit('poseFrame', frame);
+            } else {
+                socket.emit('poseData', { pose_landmarks: poseResult.landmarks, instructions });
+            }
         }
     });
 
@@ -37,7 +65,8 @@ async function startPoseDetection() {
     socket.on('poseFeedback', (data) => { handleDetection(data); });
 
     async function handleDetection(data) {
-        const { accuracy, correct, correct2, feedback } = data;
+        const { accuracy, mask, correct2, feedback } = data;
+        const correct = decodeMask(mask);
 
         // Set correct points in PoseDetection
         poseDetection.setCorrectPoints(correct, correct2);
@@ -46,6 +75,16 @@ async function startPoseDetection() {
         displayFeedback(accuracy, feedback);
     }
 
+    // Unpack the server's correctness bitmask, landmark i in bit i. Bitwise operators truncate
+    // to 32 bits and the mask has 33, so use arithmetic
+    function decodeMask(mask) {
+        const correct = new Array(33);
+        for (let i = 0; i < correct.length; i++) {
+            correct[i] = Math.floor(mask / 2 ** i) % 2;
+        }
+        return correct;
+    }
+
     // Function to display accuracy and feedback
     function displayFeedback(accuracy, feedback) {
         const canvas = document.getElementById('feedback-canva');
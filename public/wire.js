@@ -0,0 +1,120 @@
+// Binary landmark frames, decoded by poses/wire.py on the server.
+// Header (16 bytes, little-endian): u8 version, u8 flags, u16 pose id, u16 person count,
+// u16 landmark count, f64 timestamp (ms); then person x landmark x (x, y, z, visibility) float32.
+export const WIRE_VERSION = 1;
+export const HEADER_SIZE = 16;
+export const NO_POSE = 0xffff;
+const FIELDS = 4;
+
+export function encodePoseFrame(people, poseId, timestamp) {
+    const count = people.length ? people[0].length : 0;
+    const buffer = new ArrayBuffer(HEADER_SIZE + people.length * count * FIELDS * 4);
+    const header = new DataView(buffer, 0, HEADER_SIZE);
+    header.setUint8(0, WIRE_VERSION);
+    header.setUint8(1, 0);
+    header.setUint16(2, poseId, true);
+    header.setUint16(4, people.length, true);
+    header.setUint16(6, count, true);
+    header.setFloat64(8, timestamp, true);
+
+    // Float32Array uses the platform byte order, which is little-endian on every browser target
+    const body = new Float32Array(buffer, HEADER_SIZE);
+    let i = 0;
+    for (const landmarks of people) {
+        for (const landmark of landmarks) {
+            body[i++] = landmark.x;
+            body[i++] = landmark.y;
+            body[i++] = landmark.z ?? 0;
+            body[i++] = landmark.visibility ?? 1;
+        }
+    }
+    return buffer;
+}
+
+// Version 2: quantized frames for low-bandwidth clients. After the common header come a u16
+// keyframe id, a u8 delta width (0 in keyframes) and a reserved byte; then x, y, z per landmark
+// as int16 (coordinate * COORD_SCALE) in keyframes or int8 differences to the keyframe
+// otherwise; then visibility * 255 as uint8.
+export const WIRE_VERSION_QUANTIZED = 2;
+export const FLAG_KEYFRAME = 0x01;
+export const COORD_SCALE = 4096;
+const QUANT_HEADER_SIZE = 4;
+const COORDS = 3;
+
+export class QuantizedEncoder {
+    constructor(keyframeInterval = 30) {
+        this.keyframeInterval = keyframeInterval;
+        this.keyframeId = 0;
+        this.keyframe = null;
+        this.sinceKeyframe = 0;
+    }
+
+    // Called when the server lost our keyframe (e.g. after a reconnect)
+    requestKeyframe() {
+        this.keyframe = null;
+    }
+
+    encode(people, poseId, timestamp) {
+        const count = people.length ? people[0].length : 0;
+        const n = people.length * count;
+        const quantized = new Int16Array(n * COORDS);
+        const visibility = new Uint8Array(n);
+        let i = 0;
+        for (const landmarks of people) {
+            for (const landmark of landmarks) {
+                quantized[i * COORDS] = clamp(Math.round(landmark.x * COORD_SCALE), -32767, 32767);
+                quantized[i * COORDS + 1] = clamp(Math.round(landmark.y * COORD_SCALE), -32767, 32767);
+                quantized[i * COORDS + 2] = clamp(Math.round((landmark.z ?? 0) * COORD_SCALE), -32767, 32767);
+                visibility[i++] = clamp(Math.round((landmark.visibility ?? 1) * 255), 0, 255);
+            }
+        }
+
+        // Deltas must fit int8; otherwise a keyframe costs the same as int16 deltas would
+        let delta = null;
+        if (this.keyframe && this.keyframe.length === quantized.length && this.sinceKeyframe < this.keyframeInterval) {
+            delta = new Int8Array(quantized.length);
+            for (let j = 0; j < quantized.length; j++) {
+                const d = quantized[j] - this.keyframe[j];
+                if (d > 127 || d < -127) {
+                    delta = null;
+                    break;
+                }
+                delta[j] = d;
+            }
+        }
+        if (delta) {
+            this.sinceKeyframe++;
+        } else {
+            this.keyframeId = (this.keyframeId + 1) & 0xffff;
+            this.keyframe = quantized;
+            this.sinceKeyframe = 0;
+        }
+
+        const coordBytes = delta ? delta.length : quantized.length * 2;
+        const buffer = new ArrayBuffer(HEADER_SIZE + QUANT_HEADER_SIZE + coordBytes + n);
+        const view = new DataView(buffer);
+        view.setUint8(0, WIRE_VERSION_QUANTIZED);
+        view.setUint8(1, delta ? 0 : FLAG_KEYFRAME);
+        view.setUint16(2, poseId, true);
+        view.setUint16(4, people.length, true);
+        view.setUint16(6, count, true);
+        view.setFloat64(8, timestamp, true);
+        view.setUint16(16, this.keyframeId, true);
+        view.setUint8(18, delta ? 1 : 0);
+        let offset = HEADER_SIZE + QUANT_HEADER_SIZE;
+        if (delta) {
+            new Int8Array(buffer, offset, delta.length).set(delta);
+        } else {
+            for (let j = 0; j < quantized.length; j++) {
+                view.setInt16(offset + j * 2, quantized[j], true);
+            }
+        }
+        offset += coordBytes;
+        new Uint8Array(buffer, offset, n).set(visibility);
+        return buffer;
+    }
+}
+
+function clamp(value, low, high) {
+    return Math.min(high, Math.max(low, value));
+}
@@ -1,57 +1,308 @@
-import socketio
-from flask import Flask, send_from_directory
+import logging
+import time
 
-# Create a Flask app
-app = Flask(__name__, static_folder='public', static_url_path='')
+import numpy as np
+import socketio
+from flask import Flask, Response, jsonify, request, send_from_directory
 
-# Create a Socket.IO server
-sio = socketio.Server(cors_allowed_origins="*")
-app.wsgi_app = socketio.WSGIApp(sio, app.wsgi_app)
+from poses import config, log
+from poses.log import FRAMES, SERVER
+from poses.message_queue import client_manager
 
 # Import the PoseDetection class
 from poses.pose_detection import PoseDetection
+from poses.asans.landmarks import landmarks_to_array
+from poses import metrics, wire
+from poses.profiler import NULL_TIMER, PROFILER
+from poses.feedback import TOTALS as FEEDBACK_TOTALS
+from poses.frame_cache import TOTALS
+from poses.mailbox import TOTALS as FRAME_TOTALS
+from poses.session import Session
+from poses.workers import AnalysisPool
+
+# The Flask app, the Socket.IO server and the PoseDetection instance, created by setup().
+# Worker processes re-import this script as __mp_main__, so nothing is built at import time.
+app = None
+sio = None
+pose_detector = None
+
+# Metrics and profiles are labeled by pose; anything outside the catalog counts as UNKNOWN
+KNOWN_POSES = frozenset()
+
+def pose_label(instructions):
+    pose = instructions.upper() if isinstance(instructions, str) else None
+    return pose if pose in KNOWN_POSES else "UNKNOWN"
+
+def meter_emits(eio):
+    """Count the bytes of every message sent to a client, as encoded by Socket.IO; emits reach
+    Engine.IO through send_packet, other packets (e.g. the connect reply) through send."""
+    eio_send, eio_send_packet = eio.send, eio.send_packet
+
+    def metered_send(eio_sid, data):
+        metrics.EMIT_BYTES.observe(len(data))
+        return eio_send(eio_sid, data)
+
+    def metered_send_packet(eio_sid, pkt):
+        metrics.EMIT_BYTES.observe(len(pkt.data))
+        return eio_send_packet(eio_sid, pkt)
+
+    eio.send = metered_send
+    eio.send_packet = metered_send_packet
 
-# Create an instance of the PoseDetection class
-pose_detector = PoseDetection()
+# Worker processes running the analysis (see start_workers); None analyzes in this process
+analysis_pool = None
+
+def start_workers(workers):
+    """Move the pose analysis into worker processes; this process then only does I/O and dispatch."""
+    global analysis_pool
+    analysis_pool = AnalysisPool(workers)
+    analysis_pool.prewarm()
+
+# Per-client state (smoothing, orientation tracking, result cache, mailbox), keyed by sid
+sessions = {}
+
+def open_session(sid):
+    """Create a session and start the background task that analyzes its frames."""
+    session = Session(sid)
+    session.wakeup = sio.eio.create_event()
+    sessions[sid] = session
+    sio.start_background_task(process_frames, sid, session)
+    return session
+
+def process_frames(sid, session):
+    """Analyze a session's freshest frame whenever one arrives, until the client disconnects."""
+    while not session.closed:
+        session.wakeup.wait()
+        session.wakeup.clear()
+        frame = session.mailbox.take()
+        if frame is not None:
+            # Time the frame's stages while the profiler is enabled
+            timer = PROFILER.start(pose_label(frame[0]))
+            try:
+                analyze_frame(sid, session, *frame, timer=timer)
+            except Exception:
+                SERVER.exception("Error analyzing frame", extra={'sid': sid})
+            PROFILER.stop(timer)
+        sio.sleep(0)  # Let the handlers deliver newer frames
+    if session.recorder is not None:
+        session.recorder.flush()
+
+def analyze_frame(sid, session, instructions, landmarks, received_at, ts=None, timer=NULL_TIMER):
+    """Analyze one frame, a JSON payload or a decoded (33, 4) array, and emit the feedback to its client.
+
+    ts, the client's timestamp of the frame, is echoed back so clients can measure the round trip.
+    timer, from PROFILER.start, times the frame's stages.
+    """
+    # Convert a JSON payload once into a (33, 4) float32 array shared by every detector
+    if not isinstance(landmarks, np.ndarray):
+        try:
+            landmarks = landmarks_to_array(landmarks[0])
+        except ValueError as e:
+            SERVER.warning("Invalid landmarks: %s", e, extra={'sid': sid})
+            return
+    received = landmarks
+    timer.lap("convert")
+
+    if session.smoother is not None:
+        landmarks = session.smoother(landmarks, received_at)
+        timer.lap("smoothing")
+
+    # Track the orientation once per frame; every detector shares the result
+    orientation = session.orientation.update(landmarks)
+    timer.lap("orientation")
+
+    # Reuse the last result while the pose is held still
+    key = (instructions, orientation)
+    result = session.cache.lookup(key, landmarks)
+    timer.lap("cache")
+    cached = result is not None
+    if not cached:
+        # Process the pose data using the PoseDetection wrapper
+        started = time.perf_counter()
+        if analysis_pool:
+            result = analysis_pool.analyze(instructions, landmarks, orientation)  # Yields while a worker runs it
+        else:
+            # Runs without yielding, so the detectors can lap their own stages on this frame's timer
+            with PROFILER.active(timer):
+                result = pose_detector.analyze_pose(instructions, landmarks, orientation)  # Pass instructions along
+        metrics.ANALYSIS_SECONDS.labels(pose_label(instructions)).observe(time.perf_counter() - started)
+        timer.lap("analysis")
+        session.cache.store(key, landmarks, result)
+
+    # Emit feedback back to the client when it changed, or as a heartbeat; a held pose
+    # served from the cache emits nothing in silent mode
+    payload = None if cached and config.CACHE_SILENT else session.feedback.payload(result, received_at)
+    if payload is not None:
+        if ts is not None:
+            payload = dict(payload, ts=ts)  # Kept out of the change detection
+        sio.emit('poseFeedback', payload, room=sid)
+    timer.lap("emit")
+
+    if session.recorder is not None:
+        session.recorder.record(received_at, instructions, received, result, payload is not None, cached,
+                                session.mailbox.counters.dropped)
+        timer.lap("record")
 
 # Flask route to serve the HTML file
-@app.route('/')
 def index():
     return app.send_static_file('index.html')
 
 # Route to serve static files from the public directory
-@app.route('/<path:filename>')
 def serve_static(filename):
     return send_from_directory('public', filename)
 
+# Route exposing runtime counters, e.g. how often held poses were served from the cache
+def stats():
+    return jsonify({
+        'sessions': len(sessions),
+        'cache': TOTALS.as_dict(),
+        'frames': FRAME_TOTALS.as_dict(),
+        'feedback': FEEDBACK_TOTALS.as_dict(),
+        'session_cache': {sid: session.cache.stats.as_dict() for sid, session in list(sessions.items())},
+        'session_frames': {sid: dict(session.mailbox.counters.as_dict(), fps=session.frame_rate.fps)
+                           for sid, session in list(sessions.items())},
+        'session_feedback': {sid: session.feedback.counters.as_dict() for sid, session in list(sessions.items())},
+    })
+
+def collect_metrics():
+    """Register the values kept elsewhere, read at scrape time."""
+    metrics.Collected("pose_active_sessions", "Connected sessions.", lambda: len(sessions))
+    metrics.Collected("pose_frames_received_total", "Frames received.", lambda: FRAME_TOTALS.received, kind="counter")
+    metrics.Collected("pose_frames_dropped_total", "Frames replaced by a newer one before analysis.",
+                      lambda: FRAME_TOTALS.dropped, kind="counter")
+    metrics.Collected("pose_frames_analyzed_total", "Frames taken for analysis.", lambda: FRAME_TOTALS.processed,
+                      kind="counter")
+    metrics.Collected("pose_cache_hits_total", "Frames answered from the held-pose cache.", lambda: TOTALS.hits,
+                      kind="counter")
+    metrics.Collected("pose_cache_misses_total", "Frames analyzed by a detector.", lambda: TOTALS.misses, kind="counter")
+    metrics.Collected("pose_feedback_emitted_total", "poseFeedback payloads sent.", lambda: FEEDBACK_TOTALS.emitted,
+                      kind="counter")
+    metrics.Collected("pose_feedback_suppressed_total", "Unchanged poseFeedback payloads not sent.",
+                      lambda: FEEDBACK_TOTALS.suppressed, kind="counter")
+    # Per-session rates as a distribution; per-sid series would grow without bound (see /stats)
+    metrics.CollectedHistogram("pose_session_frames_per_second", "Frame rate each session sends.", metrics.RATE_BUCKETS,
+                               lambda: [session.frame_rate.fps for session in list(sessions.values())])
+
+# Route exposing the metrics in the Prometheus text format
+def metrics_route():
+    return Response(metrics.expose(), mimetype='text/plain; version=0.0.4')
+
+def monitor_event_loop(interval=0.5):
+    """Record how late the hub wakes a sleeping green thread; CPU-bound work on it shows up as lag."""
+    while True:
+        started = time.monotonic()
+        sio.sleep(interval)
+        metrics.EVENT_LOOP_LAG.observe(max(0.0, time.monotonic() - started - interval))
+
+# Route reporting per-stage p50/p95/p99 per pose; POST {"enabled": true|false} toggles the profiler
+def debug_profile():
+    if request.method == 'POST':
+        PROFILER.set_enabled(bool((request.get_json(silent=True) or {}).get('enabled', True)))
+    return jsonify({'enabled': PROFILER.enabled, 'window': PROFILER.window, 'poses': PROFILER.report()})
+
 # Socket.IO event handler for connecting clients
-@sio.event
 def connect(sid, environ):
-    print('Client connected:', sid)
+    SERVER.info("Client connected: %s", sid, extra={'sid': sid})
+    open_session(sid)
+    # Pose names by id, for clients sending binary frames
+    sio.emit('poseCatalog', {'version': wire.VERSION, 'poses': list(pose_detector.pose_catalog)}, room=sid)
 
 # Socket.IO event handler for disconnecting clients
-@sio.event
 def disconnect(sid):
-    print('Client disconnected:', sid)
+    SERVER.info("Client disconnected: %s", sid, extra={'sid': sid})
+    session = sessions.pop(sid, None)
+    if session is not None:
+        session.closed = True
+        session.wakeup.set()  # Let its analysis task exit
 
 # Socket.IO event handler for processing pose data
-@sio.event
 def poseData(sid, data):
     instructions = data.get('instructions', None)  # Extract instructions
     landmarks = data.get('pose_landmarks', None)
-    print(instructions)
+    if FRAMES.isEnabledFor(logging.DEBUG):
+        FRAMES.debug("poseData: %s", instructions, extra={'sid': sid})
 
     # Check if landmarks are provided
     if landmarks:
-        # Process the pose data using the PoseDetection wrapper
-        accuracy, pose_name, correct , feedback_str = pose_detector.analyze_pose(instructions, landmarks[0])  # Pass instructions along
+        # Hand the frame to the session's analysis task; an older unprocessed frame is dropped
+        session = sessions.get(sid)
+        if session is None:
+            FRAMES.debug("Frame after disconnect dropped", extra={'sid': sid})
+            return
+        received_at = time.monotonic()
+        session.frame_rate.tick(received_at)
+        session.mailbox.put((instructions, landmarks, received_at, data.get('ts')))
+        session.wakeup.set()
+    else:
+        FRAMES.debug("No landmarks provided", extra={'sid': sid})
+
+# Socket.IO event handler for binary pose frames (see poses/wire.py)
+def poseFrame(sid, payload):
+    # Quantized streams are decoded on arrival: the session's decoder holds their keyframe
+    session = sessions.get(sid)
+    if session is None:
+        # Handlers run as background tasks, so a frame sent just before closing can arrive after disconnect
+        FRAMES.debug("Frame after disconnect dropped", extra={'sid': sid})
+        return
+    decode_started = time.perf_counter()
+    try:
+        frame = session.decoder.decode(payload)
+    except wire.KeyframeRequired as e:
+        FRAMES.debug("Requesting keyframe: %s", e, extra={'sid': sid})
+        sio.emit('poseKeyframe', room=sid)
+        return
+    except ValueError as e:
+        SERVER.warning("Invalid pose frame: %s", e, extra={'sid': sid})
+        return
+    if frame.pose_id >= len(pose_detector.pose_catalog):
+        SERVER.warning("Unknown pose id: %d", frame.pose_id, extra={'sid': sid})
+        return
 
-        # Emit feedback back to the client
-        sio.emit('poseFeedback', {'accuracy': accuracy, 'text': pose_name, 'correct': correct , "feedback" : feedback_str}, room=sid)
+    if PROFILER.enabled:
+        PROFILER.record(pose_detector.pose_catalog[frame.pose_id], "decode", time.perf_counter() - decode_started)
+
+    if len(frame.landmarks):
+        received_at = time.monotonic()
+        session.frame_rate.tick(received_at)
+        session.mailbox.put((pose_detector.pose_catalog[frame.pose_id], frame.landmarks[0], received_at, frame.timestamp))
+        session.wakeup.set()
     else:
-        print("No landmarks provided.")
+        FRAMES.debug("No landmarks provided", extra={'sid': sid})
+
+def setup():
+    """Create the detector, the Flask app and the Socket.IO server, and register the routes,
+    event handlers and collected metrics; returns the app."""
+    global app, sio, pose_detector, KNOWN_POSES
+    log.configure()
+
+    # Create an instance of the PoseDetection class
+    pose_detector = PoseDetection()
+    KNOWN_POSES = frozenset(pose_detector.pose_catalog)
+
+    # Create a Flask app
+    app = Flask(__name__, static_folder='public', static_url_path='')
+    app.add_url_rule('/', view_func=index)
+    app.add_url_rule('/<path:filename>', view_func=serve_static)
+    app.add_url_rule('/stats', view_func=stats)
+    app.add_url_rule('/metrics', view_func=metrics_route)
+    app.add_url_rule('/debug/profile', view_func=debug_profile, methods=['GET', 'POST'])
+
+    # Create a Socket.IO server; behind cluster.py the processes share a message queue
+    sio = socketio.Server(cors_allowed_origins="*",
+                          client_manager=client_manager(config.MESSAGE_QUEUE) if config.MESSAGE_QUEUE else None)
+    for handler in (connect, disconnect, poseData, poseFrame):
+        sio.on(handler.__name__, handler)
+    meter_emits(sio.eio)
+    app.wsgi_app = socketio.WSGIApp(sio, app.wsgi_app)
+
+    collect_metrics()
+    return app
 
 if __name__ == '__main__':
+    setup()
+    if config.WORKERS > 0:
+        start_workers(config.WORKERS)
+    sio.start_background_task(monitor_event_loop)
     # Run the app with eventlet, which is needed for Socket.IO
     import eventlet
-    eventlet.wsgi.server(eventlet.listen(('', 5000)), app)
+    eventlet.wsgi.server(eventlet.listen(('', config.PORT)), app)